@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
+from .models import Favorite
+
 User = get_user_model()
 admin.site.register(User) # then we'll register this to the admin as usual
+admin.site.register(Favorite)
 
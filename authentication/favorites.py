@@ -0,0 +1,49 @@
+"""Adding and removing favorites while keeping Item.watcher_count exact.
+
+Every change locks the user's row first, so two requests from the same
+user can not both count the same favorite, and then moves watcher_count
+with one F() update per direction. Once that commits, cached list pages and
+facet counts are made stale like after any other item write.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from items.facets import invalidate_facets
+from items.list_cache import invalidate_item_list
+from items.models import Item
+from .models import Favorite, User
+
+
+def _lock_user(user):
+    list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+
+
+def _count_watchers(item_ids, delta):
+    if item_ids:
+        Item.objects.filter(id__in=item_ids).update(
+            watcher_count=F('watcher_count') + delta, version=F('version') + 1)
+        transaction.on_commit(invalidate_facets, robust=True)
+        transaction.on_commit(invalidate_item_list, robust=True)
+
+
+def add_favorites(user, item_ids):
+    """Favorite every item in `item_ids`, return the ids that were added"""
+    with transaction.atomic():
+        _lock_user(user)
+        added = set(item_ids) - set(user.favorites.filter(
+            item_id__in=item_ids).values_list('item_id', flat=True))
+        Favorite.objects.bulk_create(
+            [Favorite(user=user, item_id=item_id) for item_id in added])
+        _count_watchers(added, 1)
+    return added
+
+
+def remove_favorites(user, item_ids):
+    """Unfavorite every item in `item_ids`, return the ids that were removed"""
+    with transaction.atomic():
+        _lock_user(user)
+        removed = set(user.favorites.filter(
+            item_id__in=item_ids).values_list('item_id', flat=True))
+        user.favorites.filter(item_id__in=removed).delete()
+        _count_watchers(removed, -1)
+    return removed
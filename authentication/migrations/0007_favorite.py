@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_json_favorites(apps, schema_editor):
+    """Turn every user's JSON list of (string) item ids into Favorite rows"""
+    Favorite = apps.get_model('authentication', 'Favorite')
+    Item = apps.get_model('items', 'Item')
+    User = apps.get_model('authentication', 'User')
+
+    for user_id, favorites in User.objects.exclude(favorites=None).values_list(
+            'id', 'favorites').iterator():
+        item_ids = set()
+        for item_id in favorites or []:
+            try:
+                item_ids.add(int(item_id))
+            except (TypeError, ValueError):
+                continue
+        # favorites of deleted items are dropped
+        existing = Item.objects.filter(id__in=item_ids).values_list('id', flat=True)
+        Favorite.objects.bulk_create(
+            [Favorite(user_id=user_id, item_id=item_id) for item_id in existing],
+            ignore_conflicts=True,
+        )
+
+
+def copy_favorites_to_json(apps, schema_editor):
+    Favorite = apps.get_model('authentication', 'Favorite')
+    User = apps.get_model('authentication', 'User')
+
+    favorites = {}
+    for user_id, item_id in Favorite.objects.order_by('created_at', 'id').values_list(
+            'user_id', 'item_id'):
+        favorites.setdefault(user_id, []).append(str(item_id))
+    for user_id, item_ids in favorites.items():
+        User.objects.filter(id=user_id).update(favorites=item_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_remove_user_city_remove_user_country_and_more'),
+        ('items', '0016_item_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Favorite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorited_by', to='items.item')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorites', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='authenticat_user_id_3bd947_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'item'), name='unique_favorite_per_user_item')],
+            },
+        ),
+        migrations.RunPython(copy_json_favorites, copy_favorites_to_json),
+        migrations.RemoveField(
+            model_name='user',
+            name='favorites',
+        ),
+    ]
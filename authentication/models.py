@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 # user model that already exists in django
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
@@ -34,9 +34,6 @@ class User(AbstractUser):  # we extend the AbstractUser and add the fields that
         decimal_places=2,
         validators=[MinValueValidator(Decimal('0.01'))]
     )
-    favorites = models.JSONField(
-        default=list, blank=True, null=True)
-    
     profile_image = models.CharField(blank=True, null=True)
     
     items_sold = models.IntegerField(blank=True, null=True)
@@ -45,28 +42,54 @@ class User(AbstractUser):  # we extend the AbstractUser and add the fields that
 
     def add_favorite(self, item_id):
         """Add item_id to favorites if not already present"""
-        if self.favorites is None:
-            self.favorites = []
-        if item_id not in self.favorites:
-            self.favorites.append(item_id)
-            self.save(update_fields=['favorites'])
+        from .favorites import add_favorites
+        add_favorites(self, [item_id])
 
     def remove_favorite(self, item_id):
         """Remove item_id from favorites"""
-        if self.favorites and item_id in self.favorites:
-            self.favorites.remove(item_id)
-            self.save(update_fields=['favorites'])
+        from .favorites import remove_favorites
+        remove_favorites(self, [item_id])
 
     def toggle_favorite(self, item_id):
-        """Toggle item_id in favorites"""
-        if item_id in self.favorites:
-            self.remove_favorite(item_id)
-        else:
-            self.add_favorite(item_id)
+        """Toggle item_id in favorites, return whether it is now a favorite"""
+        from .favorites import add_favorites, remove_favorites
+        with transaction.atomic():
+            if remove_favorites(self, [item_id]):
+                return False
+            add_favorites(self, [item_id])
+            return True
 
     def is_favorited(self, item_id):
         """Check if item is favorited"""
-        return bool(self.favorites and item_id in self.favorites)
+        return Favorite.objects.filter(user=self, item_id=item_id).exists()
+
+    def favorite_item_ids(self):
+        """Ids of the user's favorite items, most recently added first"""
+        return list(self.favorites.order_by('-created_at', '-id').values_list('item_id', flat=True))
+
+
+class Favorite(models.Model):
+    user = models.ForeignKey(
+        "authentication.User",
+        related_name="favorites",
+        on_delete=models.CASCADE
+    )
+    item = models.ForeignKey(
+        "items.Item",
+        related_name="favorited_by",
+        on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'item'], name='unique_favorite_per_user_item'),
+        ]
+        indexes = [
+            # a user's favorites, newest first
+            models.Index(fields=['user', '-created_at']),
+        ]
 
 
 class BlackListedToken(models.Model):
@@ -13,6 +13,10 @@ class UserSerializer(serializers.ModelSerializer):
     # write_only=True ensures never sent back in JSON
     password = serializers.CharField(write_only=True)
     password_confirmation = serializers.CharField(write_only=True)
+    favorites = serializers.SerializerMethodField()
+
+    def get_favorites(self, user):
+        return [str(item_id) for item_id in user.favorite_item_ids()]
 
     def validate(self, data):  # data comes from the request body
         # Only validate password if both password and password_confirmation are provided
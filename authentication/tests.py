@@ -1,3 +1,114 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from common.testing import make_item, make_user
+from items.facets import item_facets
+from items.models import Item
+from .models import Favorite
+
+FAVORITES_URL = '/bidhub/auth/user/favorites/'
+
+
+class FavoritesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        cls.alice = make_user('alice')
+        cls.bob = make_user('bob')
+        cls.items = [make_item(cls.seller, item_name=f'item {i}') for i in range(3)]
+        cls.own_item = make_item(cls.alice, item_name='own item')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def watcher_counts(self):
+        return {item.id: count for item, count in zip(self.items, Item.objects.filter(
+            id__in=[item.id for item in self.items]).order_by('id').values_list(
+                'watcher_count', flat=True))}
+
+    def test_bulk_add_counts_each_item_once(self):
+        first, second, third = (item.id for item in self.items)
+        self.alice.add_favorite(first)
+        response = self.client.post(
+            FAVORITES_URL, {'item_ids': [first, second, third, self.own_item.id, 999999]},
+            format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'added': 2, 'skipped': [self.own_item.id, 999999]})
+        self.assertEqual(self.watcher_counts(), {first: 1, second: 1, third: 1})
+        self.assertEqual(Favorite.objects.filter(user=self.alice).count(), 3)
+
+    def test_bulk_remove_counts_each_item_once(self):
+        first, second, third = (item.id for item in self.items)
+        self.alice.add_favorite(first)
+        self.bob.add_favorite(first)
+        self.alice.add_favorite(second)
+        response = self.client.delete(FAVORITES_URL, {'item_ids': [first, second, third]},
+                                      format='json')
+        self.assertEqual(response.data, {'removed': 2})
+        self.assertEqual(self.watcher_counts(), {first: 1, second: 0, third: 0})
+
+    @override_settings(FAVORITES_BULK_LIMIT=2)
+    def test_bulk_requests_are_validated(self):
+        for item_ids in ([], 'abc', [1, 2, 3], ['x']):
+            response = self.client.post(FAVORITES_URL, {'item_ids': item_ids}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_list_newest_first(self):
+        for item in self.items:
+            self.alice.add_favorite(item.id)
+        response = self.client.get(FAVORITES_URL)
+        self.assertEqual(response.data['favorites'],
+                         [str(item.id) for item in reversed(self.items)])
+
+    def test_toggle(self):
+        item = self.items[0]
+        url = '/bidhub/auth/user/favorites/toggle/'
+        self.assertTrue(self.client.post(url, {'item_id': item.id}).data['is_favorited'])
+        self.assertEqual(self.watcher_counts()[item.id], 1)
+        self.assertFalse(self.client.post(url, {'item_id': item.id}).data['is_favorited'])
+        self.assertEqual(self.watcher_counts()[item.id], 0)
+        self.assertEqual(self.client.post(url, {'item_id': self.own_item.id}).status_code, 406)
+        self.assertEqual(self.client.post(url, {'item_id': 999999}).status_code, 404)
+
+    def test_counts(self):
+        first, second, _ = (item.id for item in self.items)
+        self.alice.add_favorite(first)
+        self.bob.add_favorite(first)
+        response = APIClient().get(f'/bidhub/auth/favorites/counts/?item_ids={first},{second},999999')
+        self.assertEqual(response.data['counts'], {str(first): 2, str(second): 0, '999999': 0})
+
+    def test_favorites_filter_of_item_list(self):
+        self.alice.add_favorite(self.items[1].id)
+        response = self.client.get('/bidhub/marketplace/?condition=all&favorites=true')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.items[1].id])
+
+    def test_anonymous_favorites_list_is_refused_and_not_cached(self):
+        make_item(self.seller, item_name='nobody watches this')
+        anonymous = APIClient()
+        response = anonymous.get('/bidhub/marketplace/?condition=all&favorites=true')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.has_header('X-Cache'))
+        self.assertEqual(anonymous.get('/bidhub/marketplace/?condition=all&favorites=true').status_code, 401)
+
+    def test_favorites_refresh_cached_lists_and_facets(self):
+        cache.clear()
+        url = '/bidhub/marketplace/?condition=all&watchers=desc'
+        anonymous = APIClient()
+        anonymous.get(url)
+        facets = item_facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/bidhub/auth/user/favorites/toggle/', {'item_id': self.items[2].id})
+
+        response = anonymous.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual((response.data['results'][0]['id'], response.data['results'][0]['watcher_count']),
+                         (self.items[2].id, 1))
+        # a new generation, recomputed rather than read back
+        with self.assertNumQueries(1):
+            self.assertEqual(item_facets(), facets)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(FAVORITES_URL, {'item_ids': [self.items[2].id]}, format='json')
+        self.assertEqual(anonymous.get(url)['X-Cache'], 'MISS')
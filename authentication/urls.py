@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import UserView, RegisterView, LoginView, LogoutView, ToggleFavoriteView, SellerProfileView, UsernameView, FavoritesListView
+from .views import UserView, RegisterView, LoginView, LogoutView, ToggleFavoriteView, SellerProfileView, UsernameView, FavoritesListView, FavoriteCountsView
 
 urlpatterns = [
     # Auth endpoints
@@ -12,6 +12,7 @@ urlpatterns = [
     path('user/favorites/toggle/', ToggleFavoriteView.as_view(),
          name='toggle_favorite'),
     path('user/favorites/', FavoritesListView.as_view(), name='favorites_list'),
+    path('favorites/counts/', FavoriteCountsView.as_view(), name='favorite_counts'),
 
     path('user/seller/<int:seller_id>/', UsernameView.as_view()),
     path('user/seller/<int:seller_id>/profile/', SellerProfileView.as_view()),
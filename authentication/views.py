@@ -3,12 +3,12 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import permissions
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from datetime import datetime, timedelta
-from django.utils import timezone
 from django.contrib.auth import get_user_model  # gets user model we are using
 from django.conf import settings  # import our settings for our secret
 from .serializers import UserSerializer, SellerProfileViewSerializer, UsernameSerializer
+from .favorites import add_favorites, remove_favorites
 from .models import User, BlackListedToken
 import jwt  # import jwt
 from items.models import Item
@@ -120,27 +120,36 @@ class ToggleFavoriteView(APIView):
                 {'error': 'item_id is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        item = Item.objects.get(pk=str(item_id))
-        if item.owner == request.user:
+        try:
+            item = Item.objects.only('owner_id').get(pk=item_id)
+        except (Item.DoesNotExist, ValueError):
+            return Response(
+                {'error': 'Item not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if item.owner_id == request.user.id:
             return Response(
                 {'error': 'Can not favorite your own item.'},
                 status=status.HTTP_406_NOT_ACCEPTABLE
             )
-        try:
-            # Ensure item_id is string/int as needed
-            item_id = str(item_id)
-            request.user.toggle_favorite(item_id)
+        return Response({
+            'success': True,
+            'is_favorited': request.user.toggle_favorite(item.id),
+        }, status=status.HTTP_200_OK)
 
-            return Response({
-                'success': True,
-                'is_favorited': request.user.is_favorited(item_id),
-            }, status=status.HTTP_200_OK)
 
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+def bulk_item_ids(data):
+    """Parse the item_ids list of a bulk favorites request"""
+    item_ids = data.get('item_ids')
+    if not isinstance(item_ids, list) or not item_ids:
+        raise ValidationError({'item_ids': 'A non-empty list of item ids is required.'})
+    if len(item_ids) > settings.FAVORITES_BULK_LIMIT:
+        raise ValidationError(
+            {'item_ids': f'At most {settings.FAVORITES_BULK_LIMIT} item ids per request.'})
+    try:
+        return {int(item_id) for item_id in item_ids}
+    except (TypeError, ValueError):
+        raise ValidationError({'item_ids': 'Item ids must be integers.'})
 
 
 class FavoritesListView(APIView):
@@ -148,7 +157,50 @@ class FavoritesListView(APIView):
 
     def get(self, request):
         return Response({
-            'favorites': request.user.favorites or [],
+            'favorites': [str(item_id) for item_id in request.user.favorite_item_ids()],
+        }, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        """Add many items to the user's favorites"""
+        item_ids = bulk_item_ids(request.data)
+        # existing items of other sellers; the rest are reported as skipped
+        allowed = set(Item.objects.filter(id__in=item_ids).exclude(
+            owner=request.user).values_list('id', flat=True))
+        added = add_favorites(request.user, allowed)
+        return Response({
+            'added': len(added),
+            'skipped': sorted(item_ids - allowed),
+        }, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """Remove many items from the user's favorites"""
+        item_ids = bulk_item_ids(request.data)
+        removed = remove_favorites(request.user, item_ids)
+        return Response({'removed': len(removed)}, status=status.HTTP_200_OK)
+
+
+class FavoriteCountsView(APIView):
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        """Number of users watching each of ?item_ids=1,2,3"""
+        try:
+            item_ids = {int(item_id) for item_id in
+                        request.query_params.get('item_ids', '').split(',') if item_id}
+        except ValueError:
+            return Response(
+                {'detail': 'item_ids must be a comma separated list of integers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(item_ids) > settings.FAVORITES_BULK_LIMIT:
+            return Response(
+                {'detail': f'At most {settings.FAVORITES_BULK_LIMIT} item ids per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # the counters kept on the items, read by primary key
+        counts = dict(Item.objects.filter(id__in=item_ids).values_list('id', 'watcher_count'))
+        return Response({
+            'counts': {str(item_id): counts.get(item_id, 0) for item_id in sorted(item_ids)},
         }, status=status.HTTP_200_OK)
 
 
@@ -160,8 +212,7 @@ class SellerProfileView(APIView):
             # need to get items seller sold
             items_sold = Item.objects.filter(
                 owner_id=seller_id,
-                highest_bidder__isnull=False,
-                end_time__lt=timezone.now()
+                status='SOLD'
             ).count()
             seller = User.objects.get(pk=seller_id)
             seller.items_sold = items_sold
@@ -187,47 +238,3 @@ class UsernameView(APIView):
                 {"detail": "Seller not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
-
-
-class ToggleFavoriteView(APIView):
-    permission_classes = (IsAuthenticated,)
-
-    def post(self, request):
-        item_id = request.data.get('item_id')
-
-        # Validate item_id
-        if not item_id:
-            return Response(
-                {'error': 'item_id is required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        item = Item.objects.get(pk=str(item_id))
-        if item.owner.id == request.user.id:
-            return Response(
-                {'error': 'Can not favorite your own item.'},
-                status=status.HTTP_406_NOT_ACCEPTABLE
-            )
-        try:
-            # Ensure item_id is string/int as needed
-            item_id = str(item_id)
-            request.user.toggle_favorite(item_id)
-
-            return Response({
-                'success': True,
-                'is_favorited': request.user.is_favorited(item_id),
-            }, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-
-class FavoritesListView(APIView):
-    permission_classes = (IsAuthenticated,)
-
-    def get(self, request):
-        return Response({
-            'favorites': request.user.favorites or [],
-        }, status=status.HTTP_200_OK)
@@ -1,4 +1,6 @@
 from django.contrib import admin
-from .models import Bid
+from .models import Bid, ProxyBid, UserItemBid
 
 admin.site.register(Bid)
+admin.site.register(ProxyBid)
+admin.site.register(UserItemBid)
@@ -0,0 +1,163 @@
+"""Helpers shared by the bid benchmark management commands.
+
+Everything seeded here is tagged with a random prefix so a run can be
+cleaned up without touching real marketplace data.
+"""
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from items.models import Item
+from .models import Bid
+from .services import BidRejected
+
+User = get_user_model()
+
+
+def seed_auction(bidders, items=1, initial_bid=Decimal('1.00'), minutes=60):
+    """Create a seller, `bidders` users and `items` open auctions"""
+    prefix = 'bench-' + uuid.uuid4().hex[:6]
+    seller = User.objects.create(
+        username=f'{prefix}-s',
+        email=f'{prefix}-s@bench.local',
+        first_name='Bench',
+        last_name='Seller',
+    )
+    users = User.objects.bulk_create([
+        User(
+            username=f'{prefix}-{i}',
+            email=f'{prefix}-{i}@bench.local',
+            first_name='Bench',
+            last_name='Bidder',
+        ) for i in range(bidders)
+    ])
+    end_time = timezone.now() + timedelta(minutes=minutes)
+    auctions = Item.objects.bulk_create([
+        Item(
+            item_name=f'{prefix}-{i}',
+            owner=seller,
+            description='Benchmark item',
+            height=1, width=1, length=1, weight=1,
+            initial_bid=initial_bid,
+            end_time=end_time,
+        ) for i in range(items)
+    ])
+    return prefix, seller, users, auctions
+
+
+def cleanup(prefix):
+    """Remove everything created by `seed_auction` for this prefix"""
+    items = Item.objects.filter(item_name__startswith=f'{prefix}-')
+    Bid.objects.filter(item_id__in=items).delete()
+    items.delete()
+    User.objects.filter(username__startswith=f'{prefix}-').delete()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an unsorted list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_bidders(streams, bids_each, place, start_prices):
+    """Run one thread per (user, item_id) stream, each placing `bids_each` bids.
+
+    `place(item_id, user, amount)` must store the bid or raise BidRejected,
+    anything else it raises is counted as an error. Bidders pick their next
+    amount from the highest price seen accepted on their item, so everyone
+    on an item keeps racing for the same price. `start_prices` maps each
+    item id to its opening price.
+    """
+    lock = threading.Lock()
+    prices = dict(start_prices)
+    latencies = []
+    accepted = []
+    rejected = [0]
+    errors = []
+    ready = threading.Barrier(len(streams))
+
+    def bidder(user, item_id):
+        timings = []
+        mine = []
+        refused = 0
+        failed = []
+        try:
+            ready.wait()
+            for _ in range(bids_each):
+                with lock:
+                    amount = prices[item_id] + Decimal(random.randint(1, 5))
+                started = time.perf_counter()
+                try:
+                    place(item_id, user, amount)
+                except BidRejected:
+                    refused += 1
+                except Exception as e:
+                    failed.append(str(e))
+                else:
+                    mine.append((item_id, user.id, amount))
+                    with lock:
+                        prices[item_id] = max(prices[item_id], amount)
+                finally:
+                    timings.append(time.perf_counter() - started)
+        finally:
+            with lock:
+                latencies.extend(timings)
+                accepted.extend(mine)
+                rejected[0] += refused
+                errors.extend(failed)
+            connection.close()
+
+    workers = [threading.Thread(target=bidder, args=stream) for stream in streams]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return {
+        'elapsed': time.perf_counter() - started,
+        'latencies': latencies,
+        'accepted': accepted,
+        'rejected': rejected[0],
+        'errors': errors,
+    }
+
+
+def check_consistency(item, accepted):
+    """Return a list of problems found after a run against `item`.
+
+    `accepted` is the list of (item_id, user_id, amount) bids that the bid
+    path reported as accepted, bids on other items are ignored.
+    """
+    problems = []
+    accepted = [(user_id, amount)
+                for item_id, user_id, amount in accepted if item_id == item.id]
+    item.refresh_from_db()
+    bids = list(Bid.objects.filter(item_id=item).values_list('user_id', 'bid'))
+
+    if len(bids) != len(accepted):
+        problems.append(
+            f'{len(accepted)} bids accepted but {len(bids)} bid rows stored')
+    if accepted:
+        top_user, top_amount = max(accepted, key=lambda pair: pair[1])
+        if item.current_bid != top_amount:
+            problems.append(
+                f'current_bid is {item.current_bid}, highest accepted bid was {top_amount}')
+        if item.highest_bidder_id != top_user:
+            problems.append(
+                f'highest_bidder is {item.highest_bidder_id}, expected {top_user}')
+        amounts = [amount for _, amount in bids]
+        if len(amounts) != len(set(amounts)):
+            problems.append('two accepted bids share the same amount')
+    return problems
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bids.benchmarks import check_consistency, cleanup, run_bidders, seed_auction
+from bids.services import place_bid
+
+
+class Command(BaseCommand):
+    help = "Hammer a single item with concurrent bids and check that no accepted bid is lost"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--bids', type=int, default=50,
+                            help='bids placed by each thread')
+        parser.add_argument('--keep', action='store_true',
+                            help='keep the seeded users, item and bids')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            raise CommandError(
+                'SQLite serializes writers, run this benchmark against PostgreSQL')
+
+        threads = options['threads']
+        prefix, _, users, items = seed_auction(bidders=threads)
+        item = items[0]
+
+        run = run_bidders(
+            [(user, item.id) for user in users], options['bids'],
+            place_bid, {item.id: item.initial_bid},
+        )
+        problems = check_consistency(item, run['accepted'])
+        if run['errors']:
+            problems.append(f'first error: {run["errors"][0]}')
+        accepted = len(run['accepted'])
+
+        self.stdout.write(f'threads:        {threads}')
+        self.stdout.write(f'bids attempted: {len(run["latencies"])}')
+        self.stdout.write(f'bids accepted:  {accepted}')
+        self.stdout.write(f'bids rejected:  {run["rejected"]}')
+        self.stdout.write(f'errors:         {len(run["errors"])}')
+        self.stdout.write(f'elapsed:        {run["elapsed"]:.2f}s')
+        self.stdout.write(f'accepted/sec:   {accepted / run["elapsed"]:.1f}')
+
+        if not options['keep']:
+            cleanup(prefix)
+
+        if problems:
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError('Lost updates detected')
+        self.stdout.write(self.style.SUCCESS('No lost updates'))
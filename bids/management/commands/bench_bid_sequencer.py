@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bids.benchmarks import check_consistency, cleanup, percentile, run_bidders, seed_auction
+from bids.sequencer import BidSequencer
+from bids.services import place_bid
+
+
+class Command(BaseCommand):
+    help = "Compare bid latency of the per request path and the per item sequencer on one hot item"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bidders', type=int, default=100)
+        parser.add_argument('--bids', type=int, default=20,
+                            help='bids placed by each bidder')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='sequencer writer threads')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            raise CommandError(
+                'SQLite serializes writers, run this benchmark against PostgreSQL')
+
+        sequencer = BidSequencer(workers=options['workers'])
+
+        # same signature as place_bid
+        def sequenced(item_id, user, amount):
+            return sequencer.submit(item_id, user, amount).result()
+
+        try:
+            for name, path in (('per request', place_bid), ('sequenced', sequenced)):
+                self.report(name, path, options)
+        finally:
+            sequencer.shutdown()
+
+    def report(self, name, path, options):
+        prefix, _, users, items = seed_auction(bidders=options['bidders'])
+        item = items[0]
+        try:
+            run = run_bidders([(user, item.id) for user in users], options['bids'],
+                              path, {item.id: item.initial_bid})
+            problems = check_consistency(item, run['accepted'])
+        finally:
+            cleanup(prefix)
+
+        latencies = run['latencies']
+        attempted = len(latencies)
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(f'  bids/sec:  {attempted / run["elapsed"]:.1f}')
+        self.stdout.write(f'  accepted:  {len(run["accepted"])} of {attempted}')
+        for pct in (50, 95, 99):
+            self.stdout.write(
+                f'  p{pct}:       {percentile(latencies, pct) * 1000:.1f}ms')
+        if run['errors']:
+            self.stderr.write(f'  {len(run["errors"])} errors, first: {run["errors"][0]}')
+        for problem in problems:
+            self.stderr.write(f'  {problem}')
@@ -0,0 +1,121 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import jwt
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from bids.benchmarks import check_consistency, cleanup, percentile, run_bidders, seed_auction
+from bids.services import BidRejected
+
+
+class Command(BaseCommand):
+    help = ("Fire concurrent bid streams at the bid endpoint and check the results. "
+            "Run it before and after every change to the bid path.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1,
+                            help='auctions to spread the bidders over')
+        parser.add_argument('--bidders', type=int, default=50,
+                            help='concurrent bid streams')
+        parser.add_argument('--bids', type=int, default=20,
+                            help='bids placed by each stream')
+        parser.add_argument('--url',
+                            help='base url of a running server sharing this database, '
+                                 'e.g. http://localhost:8000. Without it bids go through '
+                                 "Django's test client in this process")
+        parser.add_argument('--keep', action='store_true',
+                            help='keep the seeded users, items and bids')
+
+    def handle(self, *args, **options):
+        prefix, _, users, items = seed_auction(
+            bidders=options['bidders'], items=options['items'])
+        streams = [(user, items[i % len(items)].id) for i, user in enumerate(users)]
+        place = self.http_place(options['url']) if options['url'] else self.client_place()
+
+        try:
+            run = run_bidders(streams, options['bids'], place,
+                              {item.id: item.initial_bid for item in items})
+            problems = []
+            for item in items:
+                problems += [f'item {item.id}: {problem}'
+                             for problem in check_consistency(item, run['accepted'])]
+        finally:
+            if not options['keep']:
+                cleanup(prefix)
+
+        self.report(run, options)
+
+        if run['errors']:
+            self.stderr.write(f'first error: {run["errors"][0]}')
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError('Consistency checks failed')
+        self.stdout.write(self.style.SUCCESS('Consistency checks passed'))
+
+    def report(self, run, options):
+        latencies = run['latencies']
+        attempted = len(latencies)
+        accepted = len(run['accepted'])
+        elapsed = run['elapsed']
+
+        self.stdout.write(f'target:         {options["url"] or "test client"}')
+        self.stdout.write(f'items:          {options["items"]}')
+        self.stdout.write(f'streams:        {options["bidders"]}')
+        self.stdout.write(f'requests:       {attempted}')
+        self.stdout.write(f'elapsed:        {elapsed:.2f}s')
+        self.stdout.write(f'throughput:     {attempted / elapsed:.1f} req/s, '
+                          f'{accepted / elapsed:.1f} accepted/s')
+        for pct in (50, 95, 99):
+            self.stdout.write(f'p{pct} latency:    {percentile(latencies, pct) * 1000:.1f}ms')
+        self.stdout.write(f'rejected ratio: {run["rejected"] / max(attempted, 1):.1%}')
+        self.stdout.write(f'errors:         {len(run["errors"])}')
+
+    @staticmethod
+    def outcome(status_code, body):
+        """Turn a bid endpoint response into a return or BidRejected"""
+        if status_code == 201:
+            return body
+        if status_code == 400 and 'detail' in body:
+            raise BidRejected(body['detail'])
+        raise RuntimeError(f'{status_code}: {body}')
+
+    def client_place(self):
+        local = threading.local()
+        # every rejected bid would otherwise be logged as a bad request
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        def place(item_id, user, amount):
+            # every stream runs on its own thread with a single user
+            if getattr(local, 'client', None) is None:
+                local.client = APIClient()
+                local.client.force_authenticate(user)
+            response = local.client.post(
+                f'/bidhub/marketplace/{item_id}/bids/new/', {'bid': str(amount)}, format='json')
+            return self.outcome(response.status_code, response.json())
+
+        return place
+
+    def http_place(self, url):
+        local = threading.local()
+        base = url.rstrip('/')
+
+        def place(item_id, user, amount):
+            if getattr(local, 'session', None) is None:
+                # same token LoginView would hand out
+                token = jwt.encode(
+                    {'sub': str(user.id), 'exp': int((datetime.now() + timedelta(hours=1)).timestamp())},
+                    settings.SECRET_KEY,
+                    algorithm='HS256'
+                )
+                local.session = requests.Session()
+                local.session.headers['Authorization'] = f'Bearer {token}'
+            response = local.session.post(
+                f'{base}/bidhub/marketplace/{item_id}/bids/new/', json={'bid': str(amount)}, timeout=30)
+            return self.outcome(response.status_code, response.json())
+
+        return place
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0002_alter_bid_item_id'),
+        ('items', '0011_remove_item_bid_history_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['item_id', '-id'], name='bids_bid_item_id_754158_idx'),
+        ),
+    ]
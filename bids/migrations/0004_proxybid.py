@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:45
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0003_bid_item_id_index'),
+        ('items', '0011_remove_item_bid_history_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProxyBid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_bid', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(1.0)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proxy_bids', to='items.item')),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proxy_bids', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item_id', 'max_bid'], name='bids_proxyb_item_id_c22cd6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'item_id'), name='unique_proxy_bid_per_user_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def summarize_existing_bids(apps, schema_editor):
+    Bid = apps.get_model('bids', 'Bid')
+    Item = apps.get_model('items', 'Item')
+    UserItemBid = apps.get_model('bids', 'UserItemBid')
+
+    leaders = dict(Item.objects.filter(
+        highest_bidder__isnull=False).values_list('id', 'highest_bidder_id'))
+    rows = Bid.objects.filter(user_id__isnull=False, item_id__isnull=False).values(
+        'user_id', 'item_id').annotate(max_bid=Max('bid'), last_bid_at=Max('created_at'))
+    UserItemBid.objects.bulk_create((
+        UserItemBid(
+            user_id_id=row['user_id'],
+            item_id_id=row['item_id'],
+            max_bid=row['max_bid'],
+            last_bid_at=row['last_bid_at'],
+            is_winning=leaders.get(row['item_id']) == row['user_id'],
+        ) for row in rows.iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0004_proxybid'),
+        ('items', '0013_item_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserItemBid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_bid', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('last_bid_at', models.DateTimeField()),
+                ('is_winning', models.BooleanField(default=False)),
+                ('item_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bidder_summaries', to='items.item')),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_bids', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', '-last_bid_at'], name='bids_userit_user_id_669ddc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'item_id'), name='unique_bid_summary_per_user_item')],
+            },
+        ),
+        migrations.RunPython(summarize_existing_bids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0005_useritembid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['created_at'], name='bids_bid_created_3cd9ec_idx'),
+        ),
+    ]
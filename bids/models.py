@@ -27,3 +27,83 @@ class Bid(models.Model):
     created_at = models.DateTimeField(
         auto_now_add=True
     )
+
+    class Meta:
+        indexes = [
+            # bid history of an item, newest first
+            models.Index(fields=['item_id', '-id']),
+            # recent bids of every item, read by the trending job
+            models.Index(fields=['created_at']),
+        ]
+
+
+class ProxyBid(models.Model):
+    """The most a user is willing to pay for an item.
+
+    The bid engine raises the user's bid on their behalf, one increment at a
+    time, until another bidder goes over max_bid.
+    """
+    max_bid = models.DecimalField(
+        blank=False,
+        null=False,
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(1.00)]
+    )
+    user_id = models.ForeignKey(
+        'authentication.User',
+        on_delete=models.CASCADE,
+        related_name="proxy_bids"
+    )
+    item_id = models.ForeignKey(
+        'items.Item',
+        on_delete=models.CASCADE,
+        related_name="proxy_bids"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True
+    )
+    # when max_bid was last set, the earlier of two equal maximums wins
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_id', 'item_id'], name='unique_proxy_bid_per_user_item'),
+        ]
+        indexes = [
+            # proxies still above the current price of an item
+            models.Index(fields=['item_id', 'max_bid']),
+        ]
+
+
+class UserItemBid(models.Model):
+    """Summary of one user's bidding on one item, kept up to date by the bid path"""
+    user_id = models.ForeignKey(
+        'authentication.User',
+        on_delete=models.CASCADE,
+        related_name="item_bids"
+    )
+    item_id = models.ForeignKey(
+        'items.Item',
+        on_delete=models.CASCADE,
+        related_name="bidder_summaries"
+    )
+    max_bid = models.DecimalField(
+        max_digits=10,
+        decimal_places=2
+    )
+    last_bid_at = models.DateTimeField()
+    is_winning = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_id', 'item_id'], name='unique_bid_summary_per_user_item'),
+        ]
+        indexes = [
+            # "my bids", most recently bid on first
+            models.Index(fields=['user_id', '-last_bid_at']),
+        ]
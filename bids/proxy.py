@@ -0,0 +1,55 @@
+"""Proxy (max-bid) resolution.
+
+Instead of replaying every increment between competing proxies, the
+outcome is worked out in one pass over the item's active proxies: the
+highest ceiling wins at one increment over the runner up's ceiling, or at
+its own ceiling if that is lower. That is the price a bidding war between
+them would have reached.
+"""
+from django.conf import settings
+
+from .models import Bid, ProxyBid
+
+
+def resolve_proxies(item, current_bid, leader_id):
+    """Resolve every proxy still above the current price of `item`.
+
+    `current_bid` and `leader_id` are the price and highest bidder after
+    the latest bids, and the caller must hold the item's row lock. Returns
+    the new (current_bid, leader_id) and the unsaved Bid rows to store,
+    which is empty when nothing changes.
+    """
+    # highest ceiling first, the maximum that was set first wins a tie
+    proxies = sorted(
+        ProxyBid.objects.filter(item_id=item, max_bid__gt=current_bid).values_list(
+            'max_bid', 'updated_at', 'user_id'),
+        key=lambda proxy: (-proxy[0], proxy[1]),
+    )
+    if not proxies:
+        return current_bid, leader_id, []
+
+    # (ceiling, user_id, is_proxy) of everyone still in the race
+    ceilings = [(max_bid, user_id, True) for max_bid, _, user_id in proxies]
+    if leader_id is not None and all(user_id != leader_id for _, user_id, _ in ceilings):
+        # the leader has no proxy left and stands on the current bid
+        ceilings.append((current_bid, leader_id, False))
+
+    winner_ceiling, winner_id, _ = ceilings[0]
+    if len(ceilings) > 1:
+        runner_ceiling, runner_id, runner_is_proxy = ceilings[1]
+    else:
+        runner_ceiling, runner_id, runner_is_proxy = current_bid, None, False
+
+    # nobody is challenging the leader
+    if winner_id == leader_id and runner_ceiling <= current_bid:
+        return current_bid, leader_id, []
+
+    price = min(winner_ceiling, runner_ceiling + settings.BID_INCREMENT)
+
+    bids = []
+    if runner_is_proxy:
+        # the runner up's proxy was pushed all the way to its ceiling
+        bids.append(Bid(bid=runner_ceiling, user_id_id=runner_id, item_id=item))
+    bids.append(Bid(bid=price, user_id_id=winner_id, item_id=item))
+
+    return price, winner_id, bids
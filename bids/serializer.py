@@ -1,8 +1,34 @@
 from rest_framework import serializers
-from .models import Bid
+from .models import Bid, ProxyBid
+
+
+def mask_username(username):
+    """Hide a bidder's username except for the first and last character"""
+    return username[0] + "***" + username[-1]
 
 
 class BidSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bid
         fields = '__all__'
+
+
+class ProxyBidSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProxyBid
+        fields = '__all__'
+        read_only_fields = ('user_id', 'item_id')
+
+
+class BidHistorySerializer(serializers.ModelSerializer):
+    # bidder names are masked when read instead of being stored on the item
+    bidder = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Bid
+        fields = ('id', 'bidder', 'bid', 'created_at')
+
+    def get_bidder(self, obj):
+        if obj.user_id is None:
+            return None
+        return mask_username(obj.user_id.username)
@@ -0,0 +1,189 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from items.list_cache import invalidate_item_list
+from items.models import Item
+from notifications.outbox import record_bid
+from .models import Bid, ProxyBid, UserItemBid
+from .proxy import resolve_proxies
+from .state import get_state, is_current, load_state, remember_state
+from .stream import publish_bids
+
+
+class BidRejected(Exception):
+    """Raised when a bid can not be accepted for an item"""
+
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+
+def _lock_item(item_id):
+    """Lock the item row for the rest of the transaction"""
+    # raises Item.DoesNotExist for unknown items
+    return Item.objects.select_for_update().only(
+        'owner_id', 'end_time', 'initial_bid', 'current_bid', 'highest_bidder_id', 'version'
+    ).get(pk=item_id)
+
+
+def check_offer(owner_id, end_time, current_bid, user, amount):
+    """Return why `amount` from `user` can not be accepted, or None"""
+    if owner_id == user.id:
+        return "Cannot bid on your own item"
+    # Check if auction has ended
+    if end_time and end_time < timezone.now():
+        return "Auction has ended"
+    # prevent negative bids and bids of 0
+    if amount <= 0:
+        return "Bid must be greater than zero"
+    if current_bid >= amount:
+        return "Bid offer is lower than or equal to current bid"
+    return None
+
+
+def precheck_bid(item_id, user, amount):
+    """Turn away a bid that can not win, using the cached auction state.
+
+    Self bids, bids on ended auctions and bids at or under the cached price
+    raise BidRejected without taking the item's row lock. A bid that passes
+    here may still lose in place_bids.
+
+    An edit can extend the end time or lower the price, and the cache of
+    this process may not have heard of it, so a rejection other than a self
+    bid is only made once the cached version matches the item's; otherwise
+    the state is reloaded and the bid checked again.
+    """
+    state = get_state(item_id)
+    reason = check_offer(
+        state['owner_id'], state['end_time'], state['current_bid'], user, amount)
+    # the owner never changes, so a self bid needs no confirmation
+    if reason and state['owner_id'] != user.id and not is_current(item_id, state):
+        state = load_state(item_id)
+        reason = check_offer(
+            state['owner_id'], state['end_time'], state['current_bid'], user, amount)
+    if reason:
+        raise BidRejected(reason)
+
+
+def _update_summaries(item, bids, leader_id):
+    """Record the latest bid of everyone in `bids` in their UserItemBid row"""
+    # accepted bids only go up, so a user's last bid is also their highest
+    latest = {bid.user_id_id: bid for bid in bids}
+    UserItemBid.objects.bulk_create(
+        [UserItemBid(user_id_id=user_id, item_id=item, max_bid=bid.bid,
+                     last_bid_at=bid.created_at, is_winning=user_id == leader_id)
+         for user_id, bid in latest.items()],
+        update_conflicts=True,
+        unique_fields=['user_id', 'item_id'],
+        update_fields=['max_bid', 'last_bid_at', 'is_winning'],
+    )
+    UserItemBid.objects.filter(item_id=item, is_winning=True).exclude(
+        user_id=leader_id).update(is_winning=False)
+
+
+def _settle(item, current_bid, leader_id, accepted):
+    """Let proxies answer the accepted bids, then store the outcome.
+
+    All new Bid rows go in with one bulk insert and the item's price,
+    leader and bid counters are updated once, only if bids were accepted.
+    """
+    current_bid, leader_id, proxy_bids = resolve_proxies(
+        item, current_bid, leader_id)
+    accepted = accepted + proxy_bids
+    if not accepted:
+        return
+
+    # the item row is locked, so nobody else can add a bidder meanwhile
+    bidder_ids = {bid.user_id_id for bid in accepted}
+    new_bidders = len(bidder_ids) - UserItemBid.objects.filter(
+        item_id=item, user_id__in=bidder_ids).count()
+
+    Bid.objects.bulk_create(accepted)
+    previous_bidder_id = item.highest_bidder_id
+    item.current_bid = current_bid
+    item.highest_bidder_id = leader_id
+    item.version += 1
+    item.bid_count = F('bid_count') + len(accepted)
+    item.unique_bidder_count = F('unique_bidder_count') + new_bidders
+    item.save(update_fields=['current_bid', 'highest_bidder', 'version',
+                             'bid_count', 'unique_bidder_count'])
+    _update_summaries(item, accepted, leader_id)
+    # delivered later by the notification dispatcher, never on this path
+    record_bid(item, previous_bidder_id, accepted)
+
+    # caches and watchers only hear about bids that were committed
+    transaction.on_commit(lambda: remember_state(item), robust=True)
+    transaction.on_commit(invalidate_item_list, robust=True)
+    transaction.on_commit(lambda: publish_bids(item, accepted), robust=True)
+
+
+def place_bids(item_id, offers):
+    """Resolve a burst of bids for one item in a single transaction.
+
+    `offers` is a list of (user, amount) pairs in arrival order. The item row
+    is locked for the length of the transaction, so concurrent bids on the
+    same item are checked against the latest price one at a time and no
+    accepted bid can be overwritten by a lower one. Each offer is checked
+    against the price left by the offers before it, then active proxies get
+    one chance to answer the whole burst.
+
+    Returns one entry per offer, either the stored Bid or the BidRejected
+    explaining why it lost.
+    """
+    results = []
+    with transaction.atomic():
+        item = _lock_item(item_id)
+
+        # if first bid compare against initial_bid
+        current_bid = item.initial_bid if item.current_bid is None else item.current_bid
+        leader_id = item.highest_bidder_id
+        accepted = []
+
+        for user, amount in offers:
+            reason = check_offer(
+                item.owner_id, item.end_time, current_bid, user, amount)
+            if reason:
+                results.append(BidRejected(reason))
+                continue
+            bid = Bid(bid=amount, user_id=user, item_id=item)
+            accepted.append(bid)
+            results.append(bid)
+            current_bid = amount
+            leader_id = user.id
+
+        if accepted:
+            _settle(item, current_bid, leader_id, accepted)
+
+    return results
+
+
+def place_bid(item_id, user, amount):
+    """Accept or reject a single bid, raising BidRejected if it loses"""
+    result, = place_bids(item_id, [(user, amount)])
+    if isinstance(result, BidRejected):
+        raise result
+    return result
+
+
+def set_proxy_bid(item_id, user, max_bid):
+    """Store the most `user` will pay for an item and bid up to it.
+
+    The maximum must beat the current price like any other bid. It replaces
+    the user's previous maximum for the item, and competing proxies are
+    resolved straight away. Returns the item with its new price and leader.
+    """
+    with transaction.atomic():
+        item = _lock_item(item_id)
+
+        current_bid = item.initial_bid if item.current_bid is None else item.current_bid
+        reason = check_offer(
+            item.owner_id, item.end_time, current_bid, user, max_bid)
+        if reason:
+            raise BidRejected(reason)
+
+        ProxyBid.objects.update_or_create(
+            user_id=user, item_id=item, defaults={'max_bid': max_bid})
+        _settle(item, current_bid, item.highest_bidder_id, [])
+
+    return item
@@ -0,0 +1,72 @@
+"""Cached auction state used to reject losing bids early.
+
+For every item the cache holds the few fields a bid is checked against:
+owner, price to beat, end time and the item's version. It is refreshed after
+every committed bid, and a refresh never replaces a newer version, so the
+cached price is at most behind the real one, never ahead of it.
+
+The cache is per process when it is a LocMemCache, so an edit made through
+another worker only clears that worker's copy. A stale state could then
+hold an old end time or a price the owner has since lowered; callers that
+reject on the cached state confirm it first with `is_current`.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from items.models import Item
+
+
+def _cache():
+    return caches[settings.AUCTION_STATE_CACHE]
+
+
+def _key(item_id):
+    return f'auction-state:{item_id}'
+
+
+def _state(owner_id, end_time, initial_bid, current_bid, version):
+    return {
+        'owner_id': owner_id,
+        'end_time': end_time,
+        # if first bid compare against initial_bid
+        'current_bid': initial_bid if current_bid is None else current_bid,
+        'version': version,
+    }
+
+
+def get_state(item_id):
+    """Return the cached state of an item, loading it on a miss.
+
+    Raises Item.DoesNotExist for unknown items.
+    """
+    state = _cache().get(_key(item_id))
+    if state is None:
+        state = load_state(item_id)
+    return state
+
+
+def load_state(item_id):
+    """Read the state of an item from the database and cache it"""
+    state = _state(*Item.objects.values_list(
+        'owner_id', 'end_time', 'initial_bid', 'current_bid', 'version').get(pk=item_id))
+    _cache().set(_key(item_id), state, settings.AUCTION_STATE_TIMEOUT)
+    return state
+
+
+def is_current(item_id, state):
+    """Whether `state` still has the item's version, a pk lookup of one column"""
+    return Item.objects.filter(pk=item_id, version=state['version']).exists()
+
+
+def remember_state(item):
+    """Cache the state of an item that was just saved by the bid path"""
+    state = _state(item.owner_id, item.end_time,
+                   item.initial_bid, item.current_bid, item.version)
+    cached = _cache().get(_key(item.id))
+    if cached is None or cached['version'] < state['version']:
+        _cache().set(_key(item.id), state, settings.AUCTION_STATE_TIMEOUT)
+
+
+def forget_state(item_id):
+    """Drop the cached state after an item is edited or deleted"""
+    _cache().delete(_key(item_id))
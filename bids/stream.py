@@ -0,0 +1,196 @@
+"""Live bid stream for an item.
+
+Clients that want to watch an auction open one long-lived connection to
+bidhub/marketplace/<item_id>/bids/stream/ (Server-Sent Events over HTTP, or
+a WebSocket on the same path) instead of polling the item detail endpoint.
+Every accepted bid is published once to the configured channel backend,
+which fans the already encoded event out to every subscriber of the item.
+
+The stream is served by `BidStreamApp`, which project/asgi.py mounts in
+front of Django, so it is only available when the project runs under an
+ASGI server.
+
+InMemoryChannelBackend only reaches subscribers connected to the process
+that accepted the bid. With more than one web process (several gunicorn
+workers or machines) a subscriber would miss the bids placed through the
+others, so such deployments need BID_STREAM_BACKEND to name a backend
+shared by all processes, e.g. one over Redis or Postgres pub/sub, with the
+same subscribe()/publish() interface.
+"""
+import asyncio
+import json
+import re
+import threading
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from items.models import Item
+from .serializer import BidHistorySerializer
+
+
+class InMemoryChannelBackend:
+    """Fans events out to subscribers in this process.
+
+    Publishing is safe from any thread, each subscriber is woken on its own
+    event loop. A subscriber that falls behind loses its oldest events
+    rather than holding memory for them, every event carries the current
+    price so the next one brings it up to date.
+    """
+
+    def __init__(self, max_queued=100):
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        self._subscribers = {}  # item_id -> {(loop, queue), ...}
+
+    @contextmanager
+    def subscribe(self, item_id):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.max_queued))
+        with self._lock:
+            self._subscribers.setdefault(item_id, set()).add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(item_id, set())
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(item_id, None)
+
+    def publish(self, item_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(item_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, message)
+
+    @staticmethod
+    def _offer(queue, message):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process wide channel backend named in BID_STREAM_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(settings.BID_STREAM_BACKEND)()
+        return _backend
+
+
+def _encode(item_id, current_bid, highest_bidder, bids=()):
+    return json.dumps({
+        'item_id': item_id,
+        'current_bid': current_bid,
+        'highest_bidder': highest_bidder,
+        'bids': BidHistorySerializer(bids, many=True).data,
+    }, cls=DjangoJSONEncoder)
+
+
+def publish_bids(item, bids):
+    """Push the item's new price and the bids that set it to its watchers"""
+    get_backend().publish(item.id, _encode(
+        item.id, item.current_bid, item.highest_bidder_id, bids))
+
+
+def _snapshot(item_id):
+    """Current price of the item, sent when a client connects"""
+    current_bid, highest_bidder = Item.objects.values_list(
+        'current_bid', 'highest_bidder_id').get(pk=item_id)
+    return _encode(item_id, current_bid, highest_bidder)
+
+
+class BidStreamApp:
+    """ASGI app serving the bid stream of an item over SSE or WebSocket"""
+
+    path = re.compile(r'^/bidhub/marketplace/(?P<item_id>\d+)/bids/stream/$')
+    heartbeat = 15  # seconds between keep-alive messages
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        match = self.path.match(scope.get('path', ''))
+        if scope['type'] not in ('http', 'websocket') or not match:
+            return await self.fallback(scope, receive, send)
+
+        item_id = int(match['item_id'])
+        try:
+            snapshot = await sync_to_async(_snapshot)(item_id)
+        except Item.DoesNotExist:
+            snapshot = None
+
+        if scope['type'] == 'http':
+            await self.serve_sse(item_id, snapshot, receive, send)
+        else:
+            await self.serve_websocket(item_id, snapshot, receive, send)
+
+    async def serve_sse(self, item_id, snapshot, receive, send):
+        if snapshot is None:
+            await send({'type': 'http.response.start', 'status': 404,
+                        'headers': [(b'content-type', b'application/json')]})
+            await send({'type': 'http.response.body',
+                        'body': b'{"detail": "Item not found"}'})
+            return
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+
+        async def write(message):
+            if message is None:
+                body = b': keep-alive\n\n'
+            else:
+                body = f'event: bid\ndata: {message}\n\n'.encode()
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+        await write(snapshot)
+        await self.relay(item_id, receive, write, 'http.disconnect')
+
+    async def serve_websocket(self, item_id, snapshot, receive, send):
+        if (await receive())['type'] != 'websocket.connect':
+            return
+        if snapshot is None:
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        await send({'type': 'websocket.accept'})
+
+        async def write(message):
+            if message is not None:
+                await send({'type': 'websocket.send', 'text': message})
+
+        await write(snapshot)
+        await self.relay(item_id, receive, write, 'websocket.disconnect')
+
+    async def relay(self, item_id, receive, write, disconnect):
+        """Forward published events to the client until it goes away"""
+        with get_backend().subscribe(item_id) as queue:
+            client = asyncio.ensure_future(receive())
+            try:
+                while True:
+                    event = asyncio.ensure_future(queue.get())
+                    done, _ = await asyncio.wait(
+                        {client, event}, timeout=self.heartbeat,
+                        return_when=asyncio.FIRST_COMPLETED)
+                    if event in done:
+                        await write(event.result())
+                    else:
+                        event.cancel()
+                        if not done:
+                            await write(None)
+                    if client in done:
+                        if client.result()['type'] == disconnect:
+                            return
+                        client = asyncio.ensure_future(receive())
+            finally:
+                client.cancel()
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common.testing import make_item, make_user
+from items.models import Item
+from project.asgi import application
+from . import sequencer
+from .models import Bid, UserItemBid
+from .sequencer import BidSequencer, BidTimeout, place_bid_sequenced
+from .services import BidRejected, place_bid, place_bids, precheck_bid, set_proxy_bid
+from .state import get_state
+
+
+
+class BidTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('owner')
+        cls.alice = make_user('alice')
+        cls.bob = make_user('bob')
+        cls.carol = make_user('carol')
+
+    def setUp(self):
+        # the auction state cache outlives the test transactions
+        cache.clear()
+        self.item = make_item(self.owner)
+
+
+class PlaceBidTests(BidTestCase):
+    def test_accepted_bid_updates_item_and_summary(self):
+        bid = place_bid(self.item.id, self.alice, Decimal('11.00'))
+        place_bid(self.item.id, self.bob, Decimal('12.00'))
+        place_bid(self.item.id, self.alice, Decimal('13.00'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_bid, Decimal('13.00'))
+        self.assertEqual(self.item.highest_bidder_id, self.alice.id)
+        self.assertEqual((self.item.bid_count, self.item.unique_bidder_count), (3, 2))
+        self.assertEqual(self.item.version, 3)
+        self.assertEqual(bid.user_id_id, self.alice.id)
+        summaries = dict(UserItemBid.objects.filter(item_id=self.item).values_list(
+            'user_id', 'is_winning'))
+        self.assertEqual(summaries, {self.alice.id: True, self.bob.id: False})
+
+    def test_offer_not_above_the_locked_price_is_rejected(self):
+        place_bid(self.item.id, self.alice, Decimal('20.00'))
+        # a bid checked against an older price loses once it holds the lock
+        for amount in ('15.00', '20.00'):
+            with self.assertRaisesMessage(BidRejected, 'lower than or equal'):
+                place_bid(self.item.id, self.bob, Decimal(amount))
+        self.assertEqual(Bid.objects.filter(item_id=self.item).count(), 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.highest_bidder_id, self.alice.id)
+
+    def test_first_bid_must_beat_initial_bid(self):
+        with self.assertRaises(BidRejected):
+            place_bid(self.item.id, self.alice, Decimal('10.00'))
+
+    def test_ended_auction_and_own_item_are_rejected(self):
+        with self.assertRaisesMessage(BidRejected, 'own item'):
+            place_bid(self.item.id, self.owner, Decimal('11.00'))
+        Item.objects.filter(pk=self.item.pk).update(end_time=timezone.now() - timedelta(seconds=1))
+        with self.assertRaisesMessage(BidRejected, 'Auction has ended'):
+            place_bid(self.item.id, self.alice, Decimal('11.00'))
+
+
+@override_settings(BID_INCREMENT=Decimal('2.50'))
+class ProxyBidTests(BidTestCase):
+    def price(self):
+        self.item.refresh_from_db()
+        return self.item.current_bid, self.item.highest_bidder_id
+
+    def test_lone_proxy_opens_one_increment_over_the_start(self):
+        set_proxy_bid(self.item.id, self.alice, Decimal('50.00'))
+        self.assertEqual(self.price(), (Decimal('12.50'), self.alice.id))
+
+    def test_higher_proxy_pays_runner_up_plus_increment(self):
+        set_proxy_bid(self.item.id, self.alice, Decimal('50.00'))
+        set_proxy_bid(self.item.id, self.bob, Decimal('30.00'))
+        self.assertEqual(self.price(), (Decimal('32.50'), self.alice.id))
+        # the runner up's proxy was pushed to its ceiling
+        self.assertTrue(Bid.objects.filter(
+            item_id=self.item, user_id=self.bob, bid=Decimal('30.00')).exists())
+
+    def test_winner_never_pays_over_its_ceiling(self):
+        set_proxy_bid(self.item.id, self.alice, Decimal('50.00'))
+        set_proxy_bid(self.item.id, self.bob, Decimal('49.00'))
+        self.assertEqual(self.price(), (Decimal('50.00'), self.alice.id))
+
+    def test_earlier_of_equal_maximums_wins(self):
+        set_proxy_bid(self.item.id, self.alice, Decimal('50.00'))
+        set_proxy_bid(self.item.id, self.bob, Decimal('50.00'))
+        self.assertEqual(self.price(), (Decimal('50.00'), self.alice.id))
+
+    def test_proxy_answers_manual_bids_until_outbid(self):
+        set_proxy_bid(self.item.id, self.alice, Decimal('50.00'))
+        place_bid(self.item.id, self.carol, Decimal('40.00'))
+        self.assertEqual(self.price(), (Decimal('42.50'), self.alice.id))
+
+        place_bid(self.item.id, self.carol, Decimal('60.00'))
+        self.assertEqual(self.price(), (Decimal('60.00'), self.carol.id))
+
+    def test_proxy_under_the_price_is_rejected(self):
+        place_bid(self.item.id, self.carol, Decimal('40.00'))
+        with self.assertRaises(BidRejected):
+            set_proxy_bid(self.item.id, self.alice, Decimal('40.00'))
+
+    def test_view_reports_whether_the_user_leads(self):
+        client = APIClient()
+        set_proxy_bid(self.item.id, self.alice, Decimal('50.00'))
+        client.force_authenticate(self.bob)
+        response = client.post(f'/bidhub/marketplace/{self.item.id}/bids/proxy/', {'max_bid': '30.00'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['current_bid'], response.data['is_winning']), ('32.50', False))
+
+
+class PlaceBidsTests(BidTestCase):
+    def test_burst_is_resolved_in_order_with_one_write(self):
+        offers = [(self.alice, Decimal('11.00')), (self.bob, Decimal('11.00')),
+                  (self.bob, Decimal('15.00')), (self.owner, Decimal('20.00')),
+                  (self.alice, Decimal('14.00')), (self.alice, Decimal('16.00'))]
+        results = place_bids(self.item.id, offers)
+
+        self.assertEqual([isinstance(result, Bid) for result in results],
+                         [True, False, True, False, False, True])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_bid, Decimal('16.00'))
+        self.assertEqual(self.item.highest_bidder_id, self.alice.id)
+        self.assertEqual((self.item.bid_count, self.item.unique_bidder_count), (3, 2))
+        # the item row is written once per burst
+        self.assertEqual(self.item.version, 1)
+
+    def test_burst_with_no_winner_writes_nothing(self):
+        results = place_bids(self.item.id, [(self.alice, Decimal('5.00'))])
+        self.assertIsInstance(results[0], BidRejected)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.version, self.item.bid_count), (0, 0))
+
+
+class SequencerTests(SimpleTestCase):
+    """The sequencer with place_bids replaced, no database involved"""
+
+    def setUp(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.batches = []
+        self.sequencer = BidSequencer(workers=1, max_batch=10)
+        self.addCleanup(self.sequencer.shutdown)
+        self.addCleanup(self.gate.set)
+        patcher = mock.patch.object(sequencer, 'place_bids', self.place_bids)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def place_bids(self, item_id, offers):
+        self.started.set()
+        self.gate.wait(5)
+        self.batches.append(offers)
+        return [amount if amount > 0 else BidRejected('Bid must be greater than zero')
+                for _, amount in offers]
+
+    def test_bids_queued_behind_a_writer_are_resolved_together(self):
+        first = self.sequencer.submit(1, 'alice', 1)
+        self.started.wait(5)
+        queued = [self.sequencer.submit(1, user, amount)
+                  for user, amount in (('bob', 2), ('carol', 0), ('dave', 3))]
+        self.gate.set()
+
+        self.assertEqual(first.result(5), 1)
+        self.assertEqual(queued[0].result(5), 2)
+        with self.assertRaises(BidRejected):
+            queued[1].result(5)
+        self.assertEqual(queued[2].result(5), 3)
+        self.assertEqual(self.batches, [[('alice', 1)], [('bob', 2), ('carol', 0), ('dave', 3)]])
+
+    @override_settings(BID_SEQUENCER_TIMEOUT=0.1)
+    def test_timeouts_withdraw_queued_bids_and_report_taken_ones_as_pending(self):
+        with mock.patch.object(sequencer, 'get_sequencer', return_value=self.sequencer):
+            # taken by the writer, which is stuck at the gate
+            with self.assertRaises(BidTimeout) as taken:
+                place_bid_sequenced(1, 'alice', 1)
+            # still queued behind it
+            with self.assertRaises(BidTimeout) as queued:
+                place_bid_sequenced(1, 'bob', 2)
+        self.assertTrue(taken.exception.pending)
+        self.assertFalse(queued.exception.pending)
+
+        self.gate.set()
+        self.sequencer.shutdown()
+        # the withdrawn bid never reached place_bids
+        self.assertEqual(self.batches, [[('alice', 1)]])
+
+
+class CreateBidViewTests(BidTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_bid_is_created(self):
+        response = self.client.post(f'/bidhub/marketplace/{self.item.id}/bids/new/', {'bid': '11.00'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['bid'], '11.00')
+
+    def test_losing_bid_is_rejected(self):
+        place_bid(self.item.id, self.bob, Decimal('30.00'))
+        response = self.client.post(f'/bidhub/marketplace/{self.item.id}/bids/new/', {'bid': '25.00'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('lower than or equal', response.data['detail'])
+
+    def test_unknown_item(self):
+        response = self.client.post('/bidhub/marketplace/999999/bids/new/', {'bid': '11.00'})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(BID_SEQUENCER_ENABLED=True)
+    def test_sequencer_timeouts(self):
+        url = f'/bidhub/marketplace/{self.item.id}/bids/new/'
+        with mock.patch('bids.views.place_bid_sequenced',
+                        side_effect=BidTimeout('still being processed', pending=True)):
+            response = self.client.post(url, {'bid': '11.00'})
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.data['pending'])
+
+        with mock.patch('bids.views.place_bid_sequenced',
+                        side_effect=BidTimeout('not placed', pending=False)):
+            response = self.client.post(url, {'bid': '11.00'})
+        self.assertEqual(response.status_code, 503)
+
+
+class BidHistoryViewTests(BidTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.url = f'/bidhub/marketplace/{self.item.id}/bids/'
+        for n in range(25):
+            place_bid(self.item.id, self.bob if n % 2 else self.alice, Decimal(11 + n))
+
+    def walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data['results'])
+            url = response.data['next']
+        return pages
+
+    def test_pages_newest_first(self):
+        pages = self.walk(self.url)
+        self.assertEqual([len(page) for page in pages], [20, 5])
+        amounts = [bid['bid'] for page in pages for bid in page]
+        self.assertEqual(amounts, [f'{11 + n}.00' for n in reversed(range(25))])
+        self.assertEqual([len(page) for page in self.walk(f'{self.url}?page_size=10')], [10, 10, 5])
+
+    def test_new_bids_do_not_shift_later_pages(self):
+        expected = list(Bid.objects.filter(item_id=self.item).order_by('-id').values_list(
+            'id', flat=True))[10:20]
+        first = self.client.get(f'{self.url}?page_size=10').data
+        place_bid(self.item.id, self.carol, Decimal('50.00'))
+        second = self.client.get(first['next']).data['results']
+        self.assertEqual([bid['id'] for bid in second], expected)
+
+    def test_bidders_are_masked(self):
+        bids = self.client.get(f'{self.url}?page_size=2').data['results']
+        self.assertEqual(set(bids[0]), {'id', 'bidder', 'bid', 'created_at'})
+        self.assertEqual([bid['bidder'] for bid in bids], ['a***e', 'b***b'])
+
+    def test_unknown_item(self):
+        self.assertEqual(self.client.get('/bidhub/marketplace/999999/bids/').status_code, 404)
+
+
+class BidStreamTests(BidTestCase):
+    """The stream as an ASGI server drives it, subscribers being fed by real bids"""
+
+    async def connect(self, scope_type, item_id):
+        self.incoming = asyncio.Queue()  # what the client sends
+        self.outgoing = asyncio.Queue()  # what the app sends back
+        scope = {'type': scope_type, 'path': f'/bidhub/marketplace/{item_id}/bids/stream/',
+                 'headers': [], 'query_string': b''}
+        if scope_type == 'http':
+            scope['method'] = 'GET'
+        else:
+            self.incoming.put_nowait({'type': 'websocket.connect'})
+        self.app = asyncio.ensure_future(application(scope, self.incoming.get, self.outgoing.put))
+
+    async def disconnect(self, message_type):
+        self.incoming.put_nowait({'type': message_type})
+        await asyncio.wait_for(self.app, timeout=5)
+
+    async def next_message(self):
+        return await asyncio.wait_for(self.outgoing.get(), timeout=5)
+
+    async def bid(self, user, amount):
+        def place():
+            # publishing happens once the bid commits
+            with self.captureOnCommitCallbacks(execute=True):
+                place_bid(self.item.id, user, Decimal(amount))
+        await sync_to_async(place)()
+
+    def event(self, body):
+        event, data = body.decode().rstrip('\n').split('\n')
+        self.assertEqual(event, 'event: bid')
+        return json.loads(data.removeprefix('data: '))
+
+    async def test_sse_subscriber_receives_bids(self):
+        await self.connect('http', self.item.id)
+        start = await self.next_message()
+        self.assertEqual((start['status'], dict(start['headers'])[b'content-type']),
+                         (200, b'text/event-stream'))
+        snapshot = self.event((await self.next_message())['body'])
+        self.assertEqual((snapshot['current_bid'], snapshot['bids']), (None, []))
+
+        await self.bid(self.alice, '11.00')
+        event = self.event((await self.next_message())['body'])
+        self.assertEqual((event['item_id'], event['current_bid'], event['highest_bidder']),
+                         (self.item.id, '11.00', self.alice.id))
+        self.assertEqual([(bid['bidder'], bid['bid']) for bid in event['bids']], [('a***e', '11.00')])
+
+        await self.disconnect('http.disconnect')
+
+    async def test_websocket_subscriber_receives_bids(self):
+        await self.connect('websocket', self.item.id)
+        self.assertEqual(await self.next_message(), {'type': 'websocket.accept'})
+        self.assertIsNone(json.loads((await self.next_message())['text'])['current_bid'])
+
+        await self.bid(self.alice, '11.00')
+        await self.bid(self.bob, '12.00')
+        events = [json.loads((await self.next_message())['text']) for _ in range(2)]
+        self.assertEqual([(event['current_bid'], event['highest_bidder']) for event in events],
+                         [('11.00', self.alice.id), ('12.00', self.bob.id)])
+
+        await self.disconnect('websocket.disconnect')
+
+    async def test_unknown_item(self):
+        await self.connect('http', 999999)
+        self.assertEqual((await self.next_message())['status'], 404)
+        await asyncio.wait_for(self.app, timeout=5)
+
+        await self.connect('websocket', 999999)
+        self.assertEqual(await self.next_message(), {'type': 'websocket.close', 'code': 4404})
+        await asyncio.wait_for(self.app, timeout=5)
+
+
+class PrecheckBidTests(BidTestCase):
+    def test_rejects_self_bid_from_cache(self):
+        get_state(self.item.id)
+        with self.assertNumQueries(0), self.assertRaises(BidRejected):
+            precheck_bid(self.item.id, self.owner, Decimal('50.00'))
+
+    def test_passes_bid_above_cached_price_from_cache(self):
+        get_state(self.item.id)
+        with self.assertNumQueries(0):
+            precheck_bid(self.item.id, self.alice, Decimal('11.00'))
+
+    def test_rejects_low_bid(self):
+        with self.assertRaisesMessage(BidRejected, 'lower than or equal'):
+            precheck_bid(self.item.id, self.alice, Decimal('10.00'))
+
+    def test_lowered_price_edited_elsewhere_is_not_rejected(self):
+        get_state(self.item.id)
+        # an edit through another process leaves this process' cache alone
+        Item.objects.filter(pk=self.item.pk).update(
+            initial_bid=Decimal('5.00'), version=F('version') + 1)
+        precheck_bid(self.item.id, self.alice, Decimal('6.00'))
+        self.assertEqual(get_state(self.item.id)['current_bid'], Decimal('5.00'))
+
+    def test_extended_auction_edited_elsewhere_is_not_rejected(self):
+        Item.objects.filter(pk=self.item.pk).update(end_time=timezone.now() - timedelta(minutes=1))
+        with self.assertRaisesMessage(BidRejected, 'Auction has ended'):
+            precheck_bid(self.item.id, self.alice, Decimal('11.00'))
+        Item.objects.filter(pk=self.item.pk).update(
+            end_time=timezone.now() + timedelta(days=1), version=F('version') + 1)
+        precheck_bid(self.item.id, self.alice, Decimal('11.00'))
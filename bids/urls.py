@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import CreateBid
+from .views import CreateBid, BidHistoryView, CreateProxyBid
 
 urlpatterns = [
+    path('', BidHistoryView.as_view()),
     path('new/', CreateBid.as_view()),
+    path('proxy/', CreateProxyBid.as_view()),
 ]
\ No newline at end of file
@@ -1,82 +1,97 @@
-import decimal
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import NotFound
-from django.utils import timezone
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from django.conf import settings
 
 from items.models import Item
-from .serializer import BidSerializer
-from items.serializers.common import ItemBidUpdateSerializer
+from .models import Bid
+from .serializer import BidSerializer, BidHistorySerializer, ProxyBidSerializer
+from .services import BidRejected, place_bid, precheck_bid, set_proxy_bid
+from .sequencer import BidTimeout, place_bid_sequenced
+
+
+class BidHistoryPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'  # newest first, ids are unique so the cursor is stable
+
+
+class BidHistoryView(APIView):
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    pagination_class = BidHistoryPagination
+
+    def get(self, request, item_id):
+        """Get the bid history of an item, newest bid first"""
+        if not Item.objects.filter(pk=item_id).exists():
+            raise NotFound(detail="Item not found")
+
+        bids = Bid.objects.filter(item_id=item_id).select_related(
+            'user_id').only('id', 'bid', 'created_at', 'user_id__username')
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(bids, request, view=self)
+        serializer = BidHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class CreateBid(APIView):
     def post(self, request, item_id):
         """Create a new bid for an item"""
-        bid_str = request.data["bid"]
         try:
-            # Check if item exists
-            item = Item.objects.get(pk=item_id)
-            # assign request data to variable
-            bid = decimal.Decimal(bid_str)
-            if item.owner.id == request.user.id:
-                return Response({"detail": "Cannot bid on your own item"}, status=status.HTTP_400_BAD_REQUEST)
-            # Check if auction has ended
-            if item.end_time and item.end_time < timezone.now():
-                return Response({"detail": "Auction has ended"}, status=status.HTTP_400_BAD_REQUEST)
-            # prevent negative bids and bids of 0
-            if bid <= 0:
-                return Response({"detail": "Bid must be greater than zero"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Get highest bid for this item and compare to bid offer
-            # if first bid assign current_bid as initial_bid
-            if item.current_bid == None:
-                current_bid = item.initial_bid
-            else:
-                current_bid = item.current_bid
-            if current_bid >= bid:
-                return Response({"detail": "Bid offer is lower than or equal to current bid"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Set the bidder to current user and item to the specified item
-            bid_data = request.data.copy()
-            bid_data['user_id'] = request.user.id
-            bid_data['item_id'] = item.id
-            item.highest_bidder = request.user
-            # Create serializer with the data
-            bid_to_create = BidSerializer(data=bid_data)
-
-            if not bid_to_create.is_valid(raise_exception=True):
-                return Response(BidSerializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-            bid_to_create.save()
-
-            hidden_username = request.user.username[0] + \
-                "***" + request.user.username[-1]
-
-            bid_history = item.bid_history_json or []
-
-            new_bid = {"bidder": hidden_username, "bid": bid_str }
-            
-            bid_history.insert(0, new_bid)
-
-            item_data = {
-                'highest_bidder': request.user.id,
-                'current_bid': request.data["bid"],  # Update current_bid here
-                'bid_history_json': bid_history
-            }
-
-            item_serializer = ItemBidUpdateSerializer(
-                instance=item, data=item_data, partial=True)
-
-            if not item_serializer.is_valid(raise_exception=True):
-                # Will rollback transaction
-                return Response(item_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-            item_serializer.save()
-
-            return Response(bid_to_create.data, status=status.HTTP_201_CREATED)
+            # validate the bid amount only, bidder and item are set by the service
+            bid_to_create = BidSerializer(data={'bid': request.data["bid"]})
+            bid_to_create.is_valid(raise_exception=True)
+
+            amount = bid_to_create.validated_data['bid']
+            # stale bids are turned away from the cache, only bids that
+            # could win reach the transactional write
+            precheck_bid(item_id, request.user, amount)
+
+            # hot auctions can route bids through the per item writer
+            place = place_bid_sequenced if settings.BID_SEQUENCER_ENABLED else place_bid
+            bid = place(item_id, request.user, amount)
+
+            return Response(BidSerializer(bid).data, status=status.HTTP_201_CREATED)
+
+        except Item.DoesNotExist:
+            raise NotFound(detail="Item not found")
+        except BidRejected as e:
+            return Response({"detail": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except BidTimeout as e:
+            # a pending bid may still win, so it must not be reported as failed
+            if e.pending:
+                return Response({"detail": e.detail, "pending": True}, status=status.HTTP_202_ACCEPTED)
+            return Response({"detail": e.detail}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except Exception as e:
+            return Response({"exception": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class CreateProxyBid(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, item_id):
+        """Set the most the user will pay, the engine bids for them up to it"""
+        try:
+            proxy_to_create = ProxyBidSerializer(
+                data={'max_bid': request.data["max_bid"]})
+            proxy_to_create.is_valid(raise_exception=True)
+
+            item = set_proxy_bid(item_id, request.user,
+                                 proxy_to_create.validated_data['max_bid'])
+
+            return Response({
+                'max_bid': proxy_to_create.data['max_bid'],
+                'current_bid': str(item.current_bid),
+                'is_winning': item.highest_bidder_id == request.user.id,
+            }, status=status.HTTP_201_CREATED)
 
         except Item.DoesNotExist:
             raise NotFound(detail="Item not found")
+        except BidRejected as e:
+            return Response({"detail": e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"exception": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,32 @@
+"""Streaming responses that stay streamed under ASGI.
+
+Given a sync iterator, Django's StreamingHttpResponse served by the ASGI
+handler reads it whole with sync_to_async(list) before sending a byte, so
+an export or import report would be built in memory. `streaming_response`
+hands ASGI requests an async iterator instead, which pulls
+STREAMING_BATCH_LINES lines at a time from the sync iterator in the
+request's sync thread, where its database cursor lives, and sends each
+batch as one chunk. WSGI requests get the sync iterator as is.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+async def batched(lines, size):
+    """Async iterator over `lines` joined into chunks of `size` lines"""
+    lines = iter(lines)
+    # thread sensitive, so every batch is read on the same connection
+    next_batch = sync_to_async(lambda: ''.join(islice(lines, size)))
+    while chunk := await next_batch():
+        yield chunk
+
+
+def streaming_response(request, lines, **kwargs):
+    """StreamingHttpResponse of the text `lines`, for a DRF or Django request"""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        lines = batched(lines, settings.STREAMING_BATCH_LINES)
+    return StreamingHttpResponse(lines, **kwargs)
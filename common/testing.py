@@ -0,0 +1,31 @@
+"""Factories shared by the test modules of every app"""
+from datetime import timedelta
+from decimal import Decimal
+
+import jwt
+from django.conf import settings
+from django.utils import timezone
+
+from authentication.models import User
+from items.models import Item
+
+
+def make_user(username):
+    return User.objects.create(username=username, email=f'{username}@example.com')
+
+
+def make_item(owner, **fields):
+    """An active auction of `owner` ending in a day, with `fields` overridden"""
+    now = timezone.now()
+    defaults = dict(
+        item_name='test item', category='ELECTRONICS', condition='NEW',
+        height=1, width=1, length=1, weight=1, description='test item',
+        initial_bid=Decimal('10.00'), start_time=now, end_time=now + timedelta(days=1),
+    )
+    return Item.objects.create(owner=owner, **{**defaults, **fields})
+
+
+def auth_header(user):
+    """Authorization header of a signed in `user`, for clients without force_authenticate"""
+    token = jwt.encode({'sub': str(user.id)}, settings.SECRET_KEY, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
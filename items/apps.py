@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
 
 class itemsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'items'
+
+    def ready(self):
+        from .search import ensure_fts_triggers
+        # later migrations rebuild items_item on SQLite, dropping its triggers
+        post_migrate.connect(ensure_fts_triggers, sender=self)
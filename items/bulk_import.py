@@ -0,0 +1,108 @@
+"""Bulk item import from CSV or NDJSON.
+
+Rows are read one at a time from a file object, validated with the same
+ItemSerializer rules as CreateItem, and inserted with one bulk_create per
+chunk of rows, each chunk in its own transaction. A bad row does not stop
+the import: `import_items` yields an error entry for it and moves on, and
+ends with a summary. Nothing but the current chunk is held in memory, so
+file size does not matter.
+
+CSV files need a header row naming Item fields. Empty cells count as
+missing, and images / shipping_info cells hold JSON.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .facets import invalidate_facets
+from .images import schedule_item_images
+from .list_cache import invalidate_item_list
+from .models import Item
+from .serializers.common import ItemSerializer
+
+FORMATS = ('csv', 'ndjson')
+JSON_COLUMNS = ('images', 'shipping_info')
+
+
+class RowError(Exception):
+    """A row that could not even be parsed"""
+
+
+def guess_format(name):
+    if name and name.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+
+def read_rows(stream, file_format):
+    """Yield a dict, or a RowError, for every data row of a binary stream"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'ndjson':
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield RowError(f'Invalid JSON: {e}')
+                continue
+            yield row if isinstance(row, dict) else RowError('Row must be a JSON object')
+        return
+
+    for row in csv.DictReader(text):
+        row = {name: value for name, value in row.items() if name and value not in ('', None)}
+        try:
+            for name in JSON_COLUMNS:
+                if name in row:
+                    row[name] = json.loads(row[name])
+        except ValueError as e:
+            yield RowError(f'Invalid JSON in {name}: {e}')
+            continue
+        yield row
+
+
+def import_items(rows, owner, chunk_size=None):
+    """Create items for `owner` from `rows`, yielding a report as it goes.
+
+    Yields {'row': n, 'errors': ...} for every rejected row (1-based) and
+    finally {'created': ..., 'failed': ...}.
+    """
+    chunk_size = chunk_size or settings.ITEM_IMPORT_CHUNK_SIZE
+    created = failed = 0
+    chunk = []
+    # one serializer validates every row, building its fields once
+    validator = ItemSerializer()
+
+    for number, row in enumerate(rows, start=1):
+        if isinstance(row, RowError):
+            failed += 1
+            yield {'row': number, 'errors': {'non_field_errors': [str(row)]}}
+            continue
+
+        try:
+            chunk.append(Item(**validator.run_validation({**row, 'owner': owner.id})))
+        except ValidationError as e:
+            failed += 1
+            yield {'row': number, 'errors': e.detail}
+
+        if len(chunk) >= chunk_size:
+            created += _insert(chunk)
+            chunk = []
+
+    if chunk:
+        created += _insert(chunk)
+    yield {'created': created, 'failed': failed}
+
+
+def _insert(items):
+    with transaction.atomic():
+        Item.objects.bulk_create(items)
+        for item in items:
+            schedule_item_images(item)
+    invalidate_facets()
+    invalidate_item_list()
+    return len(items)
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.outbox import record_ended
+from .facets import invalidate_facets
+from .list_cache import invalidate_item_list
+from .models import Item
+
+
+def close_ended_auctions(batch_size=500):
+    """Mark every active auction whose end_time has passed as sold or failed.
+
+    Walks the end_time index in batches so a large backlog never locks more
+    than `batch_size` rows at once. Bids are refused once end_time has
+    passed, so highest_bidder can no longer change under us. Each batch is
+    stamped with the time its own transaction starts, so a long sweep never
+    commits a closed_at older than its commit by more than one batch.
+    Returns the number of (sold, failed) auctions.
+    """
+    now = timezone.now()
+    sold = failed = 0
+    while True:
+        ids = list(Item.objects.filter(
+            status='ACTIVE',
+            end_time__lt=now
+        ).order_by('end_time').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return sold, failed
+
+        with transaction.atomic():
+            closed_at = timezone.now()
+            batch = Item.objects.filter(id__in=ids, status='ACTIVE')
+            sold += batch.filter(highest_bidder__isnull=False).update(
+                status='SOLD', closed_at=closed_at, version=F('version') + 1)
+            failed += batch.filter(highest_bidder__isnull=True).update(
+                status='FAILED', closed_at=closed_at, version=F('version') + 1)
+            # winners and watchers hear about it from the notification dispatcher
+            record_ended(Item.objects.filter(id__in=ids, closed_at=closed_at).values_list(
+                'id', 'status', 'highest_bidder_id', 'current_bid'))
+        # closed items leave the active counts and the catalog
+        invalidate_facets()
+        invalidate_item_list()
@@ -0,0 +1,86 @@
+"""Streaming exports of a seller's items, the bids on them and their sales.
+
+Each export is a values_list() query read with iterator(chunk_size=...),
+which on PostgreSQL is a server-side cursor, and encoded one row at a time
+as NDJSON or CSV. Only one chunk of rows is in memory at any point, so the
+size of the export does not matter.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from bids.models import Bid
+from .models import Item
+
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+ITEM_COLUMNS = (
+    'id', 'item_name', 'category', 'condition', 'description', 'initial_bid',
+    'current_bid', 'highest_bidder_id', 'status', 'start_time', 'end_time',
+    'closed_at', 'created_at',
+)
+
+BID_COLUMNS = ('id', 'item_id', 'user_id', 'bid', 'created_at')
+
+SALE_COLUMNS = (
+    'id', 'item_name', 'buyer_id', 'buyer_username', 'final_price',
+    'closed_at', 'payment_confirmation', 'shipping_info',
+)
+
+
+def _items(seller_id):
+    return Item.objects.filter(owner_id=seller_id).order_by('id'), ITEM_COLUMNS
+
+
+def _bids(seller_id):
+    return Bid.objects.filter(item_id__owner_id=seller_id).order_by('id'), BID_COLUMNS
+
+
+def _sales(seller_id):
+    sales = Item.objects.filter(owner_id=seller_id, status='SOLD').annotate(
+        buyer_id=F('highest_bidder_id'),
+        buyer_username=F('highest_bidder__username'),
+        final_price=F('current_bid'),
+    )
+    return sales.order_by('id'), SALE_COLUMNS
+
+
+EXPORTS = {'items': _items, 'bids': _bids, 'sales': _sales}
+
+
+def export_rows(kind, seller_id):
+    """Return the column names and a lazy iterator of row tuples"""
+    queryset, columns = EXPORTS[kind](seller_id)
+    rows = queryset.values_list(*columns).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    return columns, rows
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def encode(columns, rows, file_format):
+    """Yield the export as lines of NDJSON or CSV text"""
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+        return
+
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,86 @@
+"""Category and condition counts for the catalog sidebar.
+
+All counts for one set of filters come from a single GROUP BY over active
+items, and the result is cached for ITEM_FACETS_TIMEOUT seconds. Creating,
+editing, deleting or closing items bumps a generation number that is part
+of every cache key, so the next request recomputes instead of serving
+counts that no longer add up. Entries of older generations are never read
+again and simply expire.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+
+from common.utils import Item_Categories
+from .models import Item
+from .search import search_items
+
+GENERATION_KEY = 'item-facets:generation'
+
+CONDITIONS = Item._meta.get_field('condition').choices
+
+
+def _cache():
+    return caches[settings.ITEM_FACETS_CACHE]
+
+
+def _generation():
+    return _cache().get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def invalidate_facets():
+    """Make every cached count stale, call after items appear, change or close"""
+    try:
+        _cache().incr(GENERATION_KEY)
+    except ValueError:
+        # nothing cached yet
+        _cache().add(GENERATION_KEY, 1, timeout=None)
+
+
+def item_facets(category='all', condition='all', owner=None, search=''):
+    """Count active items per category and per condition.
+
+    Category counts honour the selected condition and condition counts the
+    selected category, so each group shows what picking one of its values
+    would return. Every category and condition is listed, with 0 for the
+    empty ones.
+    """
+    filters = hashlib.md5(repr((category, condition, owner, search)).encode()).hexdigest()
+    key = f'item-facets:{_generation()}:{filters}'
+    facets = _cache().get(key)
+    if facets is None:
+        facets = _count(category, condition, owner, search)
+        _cache().set(key, facets, settings.ITEM_FACETS_TIMEOUT)
+    return facets
+
+
+def _count(category, condition, owner, search):
+    items = Item.objects.filter(status='ACTIVE')
+    if owner is not None:
+        items = items.filter(owner_id=owner)
+    if search:
+        items = search_items(items, search)
+
+    grid = {}
+    for row in items.order_by().values('category', 'condition').annotate(count=Count('id')):
+        grid[row['category'], row['condition']] = row['count']
+
+    by_category = dict.fromkeys((c.name for c in Item_Categories), 0)
+    by_condition = dict.fromkeys((value for value, _ in CONDITIONS), 0)
+    for (row_category, row_condition), count in grid.items():
+        if condition in ('all', row_condition):
+            by_category[row_category] = by_category.get(row_category, 0) + count
+        if category in ('all', row_category):
+            by_condition[row_condition] = by_condition.get(row_condition, 0) + count
+
+    labels = {c.name: c.value for c in Item_Categories}
+    return {
+        'total': sum(count for (row_category, row_condition), count in grid.items()
+                     if category in ('all', row_category) and condition in ('all', row_condition)),
+        'categories': [{'value': value, 'label': labels.get(value, value), 'count': count}
+                       for value, count in by_category.items()],
+        'conditions': [{'value': value, 'label': dict(CONDITIONS).get(value, value), 'count': count}
+                       for value, count in by_condition.items()],
+    }
@@ -0,0 +1,251 @@
+"""Thumbnail, card and full size derivatives of item images.
+
+`Item.images` holds references to the originals uploaded by sellers (URLs,
+or names in the default storage). After an item is created or its images
+change, `schedule_item_images` hands it to a process wide worker pool, off
+the request path. A worker downloads each original, resizes it to every
+size in ITEM_IMAGE_SIZES and stores the JPEGs through Django's default
+storage under the SHA-256 of the original, so the same picture used by
+many items is only processed and stored once.
+
+The stored names are written to `Item.image_derivatives`, one
+{size: name} dict per image in the order of `images` (None for an image
+that could not be processed). The write only happens if `images` is still
+what the worker read, so a slow worker never overwrites newer images.
+
+Seller URLs are untrusted. Only http(s) URLs resolving to public
+addresses are fetched, optionally only from ITEM_IMAGE_ALLOWED_HOSTS, and
+every redirect is checked again. The connection goes to the address that
+was checked instead of resolving the host a second time, so a DNS answer
+that changes in between (rebinding) can not point it at an internal one.
+Bodies are streamed and cut off at ITEM_IMAGE_MAX_BYTES, and images larger
+than ITEM_IMAGE_MAX_PIXELS are refused before Pillow decodes them.
+"""
+import hashlib
+import ipaddress
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .list_cache import invalidate_item_list
+from .models import Item
+
+logger = logging.getLogger(__name__)
+
+
+def source_reference(image):
+    """URL or storage name of an entry of Item.images"""
+    if isinstance(image, dict):
+        return image.get('url')
+    return image
+
+
+class UnsafeImage(Exception):
+    """An original the pipeline refuses to fetch or decode"""
+
+
+def check_url(url):
+    """Refuse URLs that are not http(s) or point at a non-public address.
+
+    Returns the address to connect to.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise UnsafeImage(f'Not an http(s) URL: {url!r}')
+    host = parts.hostname.lower()
+    allowed = settings.ITEM_IMAGE_ALLOWED_HOSTS
+    if allowed and host not in allowed:
+        raise UnsafeImage(f'Host {host!r} is not allowed')
+    try:
+        # in the resolver's order of preference
+        addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(
+            host, parts.port or (443 if parts.scheme == 'https' else 80))))
+    except (socket.gaierror, ValueError) as e:
+        raise UnsafeImage(f'Can not resolve {host!r}: {e}')
+    for address in addresses:
+        # loopback, private, link-local (cloud metadata), reserved, ...
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise UnsafeImage(f'Host {host!r} resolves to non-public address {address}')
+    return addresses[0]
+
+
+class PinnedAdapter(HTTPAdapter):
+    """Sends requests for `hostname` to `address`, an address already checked.
+
+    The Host header keeps the name, and TLS still sends it as SNI and
+    verifies the certificate against it.
+    """
+
+    def __init__(self, hostname, address):
+        self.hostname = hostname
+        self.address = address
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, server_hostname=self.hostname, **kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        netloc = f'[{self.address}]' if ':' in self.address else self.address
+        if parts.port:
+            netloc = f'{netloc}:{parts.port}'
+        request.headers['Host'] = parts.netloc.rpartition('@')[2]
+        request.url = urlunsplit(parts._replace(netloc=netloc))
+        return super().send(request, **kwargs)
+
+
+def fetch_url(url):
+    """Download at most ITEM_IMAGE_MAX_BYTES, checking every redirect hop"""
+    for _ in range(settings.ITEM_IMAGE_MAX_REDIRECTS + 1):
+        address = check_url(url)
+        parts = urlsplit(url)
+        with requests.Session() as session:
+            session.mount(f'{parts.scheme}://', PinnedAdapter(parts.hostname, address))
+            with session.get(url, timeout=settings.ITEM_IMAGE_FETCH_TIMEOUT,
+                             stream=True, allow_redirects=False) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers['Location'])
+                    continue
+                response.raise_for_status()
+                if int(response.headers.get('Content-Length') or 0) > settings.ITEM_IMAGE_MAX_BYTES:
+                    raise UnsafeImage(f'{url!r} is larger than ITEM_IMAGE_MAX_BYTES')
+                data = bytearray()
+                for block in response.iter_content(64 * 1024):
+                    data += block
+                    if len(data) > settings.ITEM_IMAGE_MAX_BYTES:
+                        raise UnsafeImage(f'{url!r} is larger than ITEM_IMAGE_MAX_BYTES')
+                return bytes(data)
+    raise UnsafeImage(f'Too many redirects for {url!r}')
+
+
+def read_original(reference):
+    if '://' in reference:
+        return fetch_url(reference)
+    with default_storage.open(reference) as original:
+        if original.size > settings.ITEM_IMAGE_MAX_BYTES:
+            raise UnsafeImage(f'{reference!r} is larger than ITEM_IMAGE_MAX_BYTES')
+        return original.read()
+
+
+def derivative_names(digest):
+    return {size: f'items/images/{digest[:2]}/{digest}/{size}.jpg'
+            for size in settings.ITEM_IMAGE_SIZES}
+
+
+def make_derivatives(data):
+    """Store every size of the image in `data`, return {size: storage name}"""
+    # imported here so the rest of the app does not need Pillow
+    from PIL import Image, ImageOps
+
+    names = derivative_names(hashlib.sha256(data).hexdigest())
+    missing = {size: name for size, name in names.items() if not default_storage.exists(name)}
+    if not missing:
+        return names
+
+    with Image.open(BytesIO(data)) as original:
+        # Image.open only reads the header, check the size before decoding
+        width, height = original.size
+        if width * height > settings.ITEM_IMAGE_MAX_PIXELS:
+            raise UnsafeImage(f'Image of {width}x{height} pixels is too large')
+        original = ImageOps.exif_transpose(original).convert('RGB')
+        for size, name in missing.items():
+            edge = settings.ITEM_IMAGE_SIZES[size]
+            resized = original.copy()
+            resized.thumbnail((edge, edge))
+            buffer = BytesIO()
+            resized.save(buffer, 'JPEG', quality=settings.ITEM_IMAGE_QUALITY, optimize=True)
+            # another worker may have stored the same picture meanwhile
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+    return names
+
+
+def process_item_images(item_id):
+    """Build the derivatives of every image of an item and record them"""
+    try:
+        images = Item.objects.values_list('images', flat=True).get(pk=item_id) or []
+    except Item.DoesNotExist:
+        return
+
+    derivatives = []
+    for image in images:
+        reference = source_reference(image)
+        try:
+            derivatives.append(make_derivatives(read_original(reference)) if reference else None)
+        except Exception:
+            logger.exception('Could not process image %r of item %s', reference, item_id)
+            derivatives.append(None)
+
+    updated = Item.objects.filter(pk=item_id, images=images).update(
+        image_derivatives=derivatives, version=F('version') + 1)
+    if updated:
+        invalidate_item_list()
+
+
+def image_urls(image, derivatives):
+    """Per-size URLs of an image, falling back to the original"""
+    reference = source_reference(image)
+    derivatives = derivatives or {}
+    return {size: default_storage.url(derivatives[size]) if size in derivatives else reference
+            for size in settings.ITEM_IMAGE_SIZES}
+
+
+class ImagePipeline:
+    def __init__(self, workers=None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or settings.ITEM_IMAGE_WORKERS,
+            thread_name_prefix='item-images',
+        )
+        self._lock = threading.Lock()
+        self._pending = set()  # items queued and not started yet
+
+    def submit(self, item_id):
+        with self._lock:
+            if item_id in self._pending:
+                return
+            self._pending.add(item_id)
+        self._executor.submit(self._run, item_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _run(self, item_id):
+        with self._lock:
+            self._pending.discard(item_id)
+        try:
+            process_item_images(item_id)
+        except Exception:
+            logger.exception('Image pipeline failed for item %s', item_id)
+        finally:
+            close_old_connections()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """Return the process wide image pipeline, starting it on first use"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = ImagePipeline()
+        return _pipeline
+
+
+def schedule_item_images(item):
+    """Process the item's images once the current transaction commits"""
+    if not settings.ITEM_IMAGE_PIPELINE_ENABLED or not item.images:
+        return
+    transaction.on_commit(lambda: get_pipeline().submit(item.id), robust=True)
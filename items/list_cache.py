@@ -0,0 +1,75 @@
+"""Shared response cache for anonymous item list requests.
+
+Anonymous visitors all see the same catalog, so a list response is stored
+under its normalized query string and served to everyone asking for the
+same page. The key also carries a generation number that is bumped by
+anything that can change a listed item: item create, edit and delete,
+shipping and payment updates, accepted bids, favorites and auction closing.
+A bump makes every stored page unreachable at once, and
+ITEM_LIST_CACHE_TIMEOUT bounds how long a process can miss a bump made by
+another one when the cache is not shared.
+
+The backend is whichever Django cache ITEM_LIST_CACHE names, local memory
+by default. Pointing it at a shared cache (Redis, Memcached) lets every
+process serve pages the others stored and see their bumps immediately.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY = 'item-list:generation'
+HITS_KEY = 'item-list:hits'
+MISSES_KEY = 'item-list:misses'
+
+
+def _cache():
+    return caches[settings.ITEM_LIST_CACHE]
+
+
+def _key(request):
+    # the same parameters in any order are the same page; the host is part
+    # of the key because pagination links are absolute
+    params = sorted((name, value) for name, values in request.query_params.lists()
+                    for value in values)
+    normalized = repr((request.get_host(), params)).encode()
+    generation = _cache().get_or_set(GENERATION_KEY, 1, timeout=None)
+    return f'item-list:{generation}:{hashlib.md5(normalized).hexdigest()}'
+
+
+def _count(key):
+    try:
+        _cache().incr(key)
+    except ValueError:
+        _cache().add(key, 1, timeout=None)
+
+
+def get_cached_page(request):
+    """Return (cache key, stored response data or None) for a list request"""
+    key = _key(request)
+    data = _cache().get(key)
+    _count(MISSES_KEY if data is None else HITS_KEY)
+    return key, data
+
+
+def cache_page(key, data):
+    _cache().set(key, data, settings.ITEM_LIST_CACHE_TIMEOUT)
+
+
+def invalidate_item_list():
+    """Make every cached list page stale"""
+    try:
+        _cache().incr(GENERATION_KEY)
+    except ValueError:
+        _cache().add(GENERATION_KEY, 1, timeout=None)
+
+
+def list_cache_stats():
+    hits = _cache().get(HITS_KEY, 0)
+    misses = _cache().get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / (hits + misses) if hits + misses else None,
+        'generation': _cache().get(GENERATION_KEY),
+    }
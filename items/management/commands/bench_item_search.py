@@ -0,0 +1,106 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bids.benchmarks import percentile
+from common.utils import Item_Categories
+from items.models import Item
+
+User = get_user_model()
+
+# common words come first, picked with a skewed distribution so the catalog
+# has both very frequent and rare terms like real listings
+WORDS = (
+    'vintage new used black white red blue green wooden metal leather glass '
+    'camera lens guitar amp bicycle helmet watch ring necklace lamp chair table '
+    'sofa rug mirror vase book novel comic poster vinyl record console '
+    'controller keyboard mouse monitor laptop tablet phone charger speaker '
+    'headphones jacket boots sneakers dress scarf handbag wallet sunglasses '
+    'tent stove kayak paddle skateboard drone telescope microscope typewriter '
+    'gramophone sextant astrolabe harpsichord'
+).split()
+
+QUERIES = ['camera', 'vintage leather', '"wooden table"', 'guitar -amp', 'astrolabe', 'nothingmatches']
+
+
+class Command(BaseCommand):
+    help = "Seed a large catalog and measure item search latency through the list endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='requests per query')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix',
+                            help='reuse a catalog seeded by an earlier --keep run')
+        parser.add_argument('--keep', action='store_true',
+                            help='keep the seeded catalog for later runs')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if prefix:
+            seller = User.objects.get(username=f'{prefix}-s')
+        else:
+            prefix, seller = self.seed(options['items'], options['batch_size'])
+
+        try:
+            self.stdout.write(f'catalog:  {Item.objects.filter(owner=seller).count()} items '
+                              f'({connection.vendor}, prefix {prefix})')
+            # signed in, so every sample runs the search instead of hitting
+            # the anonymous list cache
+            client = APIClient()
+            client.force_authenticate(seller)
+            for params in ({}, {'category': Item_Categories.ELECTRONICS.name}):
+                for q in QUERIES:
+                    self.measure(client, {'q': q, 'condition': 'all', **params}, options['repeat'])
+        finally:
+            if not options['keep']:
+                Item.objects.filter(owner=seller).delete()
+                seller.delete()
+
+    def seed(self, count, batch_size):
+        prefix = 'bench-' + uuid.uuid4().hex[:6]
+        seller = User.objects.create(
+            username=f'{prefix}-s', email=f'{prefix}-s@bench.local',
+            first_name='Bench', last_name='Seller')
+        rng = random.Random(0)
+        weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+        categories = [category.name for category in Item_Categories]
+        end_time = timezone.now() + timedelta(days=7)
+
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            Item.objects.bulk_create([
+                Item(
+                    item_name=' '.join(rng.choices(WORDS, weights, k=2))[:24],
+                    description=' '.join(rng.choices(WORDS, weights, k=30)),
+                    owner=seller, category=rng.choice(categories),
+                    condition=rng.choice(['NEW', 'USED']),
+                    height=1, width=1, length=1, weight=1,
+                    initial_bid=1, end_time=end_time,
+                ) for _ in range(min(batch_size, count - offset))
+            ])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE items_item')
+        self.stdout.write(f'seeded:   {count} items in {time.perf_counter() - started:.1f}s')
+        return prefix, seller
+
+    def measure(self, client, params, repeat):
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get('/bidhub/marketplace/', params)
+            latencies.append(time.perf_counter() - started)
+        found = response.json()['count']
+        label = ' '.join(f'{key}={value}' for key, value in params.items() if key != 'condition')
+        self.stdout.write(
+            f'{label:40} {found:>8} hits  '
+            + '  '.join(f'p{pct} {percentile(latencies, pct) * 1000:7.1f}ms' for pct in (50, 95, 99)))
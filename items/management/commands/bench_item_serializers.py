@@ -0,0 +1,78 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from bids.benchmarks import percentile
+from items.models import Item
+from items.serializers.card import card_queryset, item_cards
+from items.serializers.common import ItemSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare the full item serializer with item cards over list pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='pages serialized per representation')
+
+    def handle(self, *args, **options):
+        prefix = 'bench-' + uuid.uuid4().hex[:6]
+        seller = User.objects.create(
+            username=f'{prefix}-s', email=f'{prefix}-s@bench.local',
+            first_name='Bench', last_name='Seller')
+        try:
+            Item.objects.bulk_create([
+                Item(
+                    item_name=f'{prefix}-{i}', owner=seller,
+                    description='A well kept item with a long description. ' * 40,
+                    images=[f'https://images.example.com/{prefix}/{i}/{n}.jpg' for n in range(6)],
+                    shipping_info={'carrier': 'UPS', 'address': '1 Main Street', 'city': 'Springfield'},
+                    height=1, width=1, length=1, weight=1, initial_bid=1,
+                    end_time=timezone.now() + timedelta(days=7),
+                ) for i in range(options['page_size'])
+            ])
+            items = Item.objects.filter(owner=seller).order_by('-created_at', '-id')
+
+            full = self.measure('full', options['repeat'],
+                                lambda: list(items.all()), lambda page: ItemSerializer(page, many=True).data)
+            cards = self.measure('card', options['repeat'],
+                                 lambda: list(card_queryset(items, item_cards, 'created_at')),
+                                 item_cards.serialize)
+        finally:
+            Item.objects.filter(owner=seller).delete()
+            seller.delete()
+
+        self.stdout.write(
+            f'card pages are {full["bytes"] / cards["bytes"]:.1f}x smaller, serialize '
+            f'{full["serialize"] / cards["serialize"]:.1f}x faster and query + serialize '
+            f'{full["total"] / cards["total"]:.1f}x faster')
+
+    def measure(self, label, repeat, fetch, serialize):
+        fetch_times, serialize_times = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            page = fetch()
+            fetched = time.perf_counter()
+            data = serialize(page)
+            fetch_times.append(fetched - started)
+            serialize_times.append(time.perf_counter() - fetched)
+        size = len(JSONRenderer().render(data))
+
+        result = {
+            'bytes': size,
+            'serialize': percentile(serialize_times, 50),
+            'total': percentile([a + b for a, b in zip(fetch_times, serialize_times)], 50),
+        }
+        self.stdout.write(
+            f'{label}:  {len(page)} items  {size / 1024:7.1f} KiB  '
+            f'query p50 {percentile(fetch_times, 50) * 1000:6.2f}ms  '
+            f'serialize p50 {result["serialize"] * 1000:6.2f}ms')
+        return result
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from items.price_index import update_price_index
+
+
+class Command(BaseCommand):
+    help = "Add auctions closed since the last run to the realized-price index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='rebuild the index from every closed auction')
+
+    def handle(self, *args, **options):
+        added = update_price_index(full=options['full'])
+        self.stdout.write(f'Added {added} closed auctions to the price index')
@@ -0,0 +1,22 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from items.similar import build_similar_items
+
+
+class Command(BaseCommand):
+    help = "Recompute the nearest neighbours of every active item for the similar items endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=settings.SIMILAR_ITEMS_K,
+                            help='neighbours kept per item')
+        parser.add_argument('--block-size', type=int, default=settings.SIMILAR_ITEMS_BLOCK_SIZE)
+        parser.add_argument('--chunk-size', type=int, default=settings.SIMILAR_ITEMS_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = build_similar_items(options['k'], options['block_size'], options['chunk_size'])
+        self.stdout.write(f'Found the neighbours of {count} items '
+                          f'in {time.perf_counter() - started:.1f}s')
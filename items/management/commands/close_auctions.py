@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from items.closing import close_ended_auctions
+
+
+class Command(BaseCommand):
+    help = "Close auctions whose end time has passed and record whether they sold"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true',
+                            help='keep sweeping until interrupted')
+        parser.add_argument('--interval', type=float, default=15,
+                            help='seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            sold, failed = close_ended_auctions(options['batch_size'])
+            if sold or failed or not options['loop']:
+                self.stdout.write(f'Closed {sold + failed} auctions '
+                                  f'({sold} sold, {failed} failed)')
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
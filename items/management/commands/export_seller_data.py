@@ -0,0 +1,33 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from items.export import EXPORTS, FORMATS, encode, export_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream a seller's items, the bids on them or their sales as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--seller', required=True, help='username of the seller')
+        parser.add_argument('--file-format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--output', help='file to write to, stdout by default')
+
+    def handle(self, *args, **options):
+        try:
+            seller = User.objects.get(username=options['seller'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["seller"]}')
+
+        columns, rows = export_rows(options['kind'], seller.id)
+        out = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in encode(columns, rows, options['file_format']):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,37 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from items.bulk_import import FORMATS, guess_format, import_items, read_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import items for a seller from a CSV or NDJSON file, reporting rejected rows as NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--owner', required=True, help='username of the seller')
+        parser.add_argument('--file-format', choices=FORMATS,
+                            help='defaults to ndjson for .ndjson / .jsonl files, csv otherwise')
+        parser.add_argument('--chunk-size', type=int,
+                            help='rows validated and inserted together')
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["owner"]}')
+
+        file_format = options['file_format'] or guess_format(options['path'])
+        with open(options['path'], 'rb') as stream:
+            for entry in import_items(read_rows(stream, file_format), owner, options['chunk_size']):
+                if 'row' in entry:
+                    self.stderr.write(json.dumps(entry))
+                else:
+                    summary = entry
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {summary["created"]} items, rejected {summary["failed"]} rows'))
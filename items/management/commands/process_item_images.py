@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from items.images import process_item_images
+from items.models import Item
+
+
+class Command(BaseCommand):
+    help = "Build missing image derivatives, e.g. for items listed before the image pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='rebuild every item with images, not only those without derivatives')
+
+    def handle(self, *args, **options):
+        items = Item.objects.exclude(images=[]).exclude(images__isnull=True)
+        if not options['all']:
+            items = items.filter(image_derivatives=[])
+
+        processed = 0
+        for item_id in items.values_list('id', flat=True).iterator():
+            process_item_images(item_id)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(f'Processed images of {processed} items'))
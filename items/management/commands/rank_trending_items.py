@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from items.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = "Rank active items by recent bid velocity and store the trending feed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='keep refreshing until interrupted')
+        parser.add_argument('--interval', type=float, default=settings.TRENDING_REFRESH_INTERVAL,
+                            help='seconds between refreshes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            feed = refresh_trending()
+            self.stdout.write(f'Ranked {len(feed["results"])} trending items '
+                              f'in {(time.perf_counter() - started) * 1000:.0f}ms')
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from items.popularity import recount_popularity
+
+
+class Command(BaseCommand):
+    help = "Recompute the bid, bidder and watcher counters of every item from bids and favorites"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='only report how many items are off')
+
+    def handle(self, *args, **options):
+        checked, fixed = recount_popularity(options['batch_size'], options['dry_run'])
+        verb = 'would fix' if options['dry_run'] else 'fixed'
+        self.stdout.write(f'Checked {checked} items, {verb} {fixed}')
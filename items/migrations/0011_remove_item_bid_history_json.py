@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0010_alter_item_height_alter_item_length_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='item',
+            name='bid_history_json',
+        ),
+    ]
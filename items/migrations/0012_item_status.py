@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def close_ended_auctions(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    ended = Item.objects.filter(end_time__lte=timezone.now())
+    ended.filter(highest_bidder__isnull=False).update(
+        status='SOLD', closed_at=F('end_time'))
+    ended.filter(highest_bidder__isnull=True).update(
+        status='FAILED', closed_at=F('end_time'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0011_remove_item_bid_history_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='status',
+            field=models.CharField(choices=[('ACTIVE', 'Active'), ('SOLD', 'Sold'), ('FAILED', 'Failed')], default='ACTIVE', max_length=6),
+        ),
+        migrations.RunPython(close_ended_auctions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['status', 'category', 'condition'], name='items_item_status_03edd0_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0013_item_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['end_time', 'id'], name='item_active_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['current_bid', 'id'], name='item_active_bid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['start_time', 'id'], name='item_active_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['created_at', 'id'], name='item_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['category', 'end_time', 'id'], name='item_active_cat_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['category', 'created_at', 'id'], name='item_active_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['owner', 'status', 'created_at', 'id'], name='item_owner_status_idx'),
+        ),
+    ]
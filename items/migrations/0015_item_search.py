@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:55
+
+from django.db import migrations
+
+# see items/search.py for the queries using these
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE items_item ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(item_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX items_item_search_idx ON items_item USING GIN (search_vector)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS items_item_search_idx',
+    'ALTER TABLE items_item DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE items_item_fts USING fts5(
+        item_name, description, content='items_item', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER items_item_fts_insert AFTER INSERT ON items_item BEGIN
+        INSERT INTO items_item_fts(rowid, item_name, description)
+        VALUES (new.id, new.item_name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER items_item_fts_delete AFTER DELETE ON items_item BEGIN
+        INSERT INTO items_item_fts(items_item_fts, rowid, item_name, description)
+        VALUES ('delete', old.id, old.item_name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER items_item_fts_update AFTER UPDATE OF item_name, description ON items_item BEGIN
+        INSERT INTO items_item_fts(items_item_fts, rowid, item_name, description)
+        VALUES ('delete', old.id, old.item_name, old.description);
+        INSERT INTO items_item_fts(rowid, item_name, description)
+        VALUES (new.id, new.item_name, new.description);
+    END
+    """,
+    "INSERT INTO items_item_fts(items_item_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS items_item_fts_update',
+    'DROP TRIGGER IF EXISTS items_item_fts_delete',
+    'DROP TRIGGER IF EXISTS items_item_fts_insert',
+    'DROP TABLE IF EXISTS items_item_fts',
+]
+
+
+def run(statements):
+    """Run the statements written for the current database vendor"""
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0014_item_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_existing(apps, schema_editor):
+    Bid = apps.get_model('bids', 'Bid')
+    Favorite = apps.get_model('authentication', 'Favorite')
+    Item = apps.get_model('items', 'Item')
+
+    def per_item(queryset, count):
+        counted = queryset.filter(item_id=OuterRef('pk')).order_by().values(
+            'item_id').annotate(n=count).values('n')
+        return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+    Item.objects.update(
+        bid_count=per_item(Bid.objects, Count('id')),
+        unique_bidder_count=per_item(Bid.objects, Count('user_id', distinct=True)),
+        watcher_count=per_item(Favorite.objects, Count('id')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0016_item_image_derivatives'),
+        ('authentication', '0007_favorite'),
+        ('bids', '0005_useritembid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='unique_bidder_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='watcher_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # fill the counters before indexing them
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['bid_count', 'id'], name='item_active_bid_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['unique_bidder_count', 'id'], name='item_active_bidders_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['watcher_count', 'id'], name='item_active_watchers_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0018_similaritem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('ELECTRONICS', 'Electronics'), ('COMPUTERS', 'Computers & Accessories'), ('CLOTHING', 'Clothing, Shoes & Jewelry'), ('HOME', 'Home & Kitchen'), ('BOOKS', 'Books'), ('TOYS', 'Toys & Games'), ('BEAUTY', 'Beauty & Personal Care'), ('SPORTS', 'Sports & Outdoors'), ('AUTOMOTIVE', 'Automotive'), ('TOOLS', 'Tools & Home Improvement'), ('HEALTH', 'Health & Household'), ('CELLPHONES', 'Cell Phones & Accessories'), ('PETS', 'Pet Supplies'), ('VIDEO_GAMES', 'Video Games'), ('OFFICE', 'Office Products'), ('GARDEN', 'Patio, Lawn & Garden'), ('MUSIC', 'Musical Instruments'), ('COLLECTIBLES', 'Collectibles & Fine Art'), ('MISCELLANEOUS', 'Miscellaneous')])),
+                ('condition', models.CharField(choices=[('USED', 'Used'), ('NEW', 'New')], max_length=4)),
+                ('closed_count', models.PositiveIntegerField(default=0)),
+                ('sold_count', models.PositiveIntegerField(default=0)),
+                ('price_total', models.FloatField(default=0)),
+                ('price_ratio_total', models.FloatField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+                ('mean_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('p10', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('p25', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('p50', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('p75', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('p90', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('closed_through', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('closed_at__isnull', False)), fields=['closed_at'], name='item_closed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='priceindex',
+            constraint=models.UniqueConstraint(fields=('category', 'condition'), name='unique_price_index_group'),
+        ),
+    ]
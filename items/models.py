@@ -5,6 +5,12 @@ from django.utils import timezone
 
 
 class Item(models.Model):
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('SOLD', 'Sold'),
+        ('FAILED', 'Failed'),
+    ]
+
     item_name = models.CharField(
         max_length=24,
         blank=False,
@@ -104,8 +110,8 @@ class Item(models.Model):
 
     images = models.JSONField(default=list, blank=True, null=True)
 
-    bid_history_json = models.JSONField(
-        default=list, blank=True, null=True)
+    # {size: storage name} per entry of images, written by items.images
+    image_derivatives = models.JSONField(default=list, blank=True)
 
     highest_bidder = models.ForeignKey(
         "authentication.User",
@@ -121,4 +127,120 @@ class Item(models.Model):
     shipping_info = models.JSONField(
         default=dict, blank=True, null=True)
 
+    # written by the close_auctions worker once end_time has passed
+    status = models.CharField(
+        max_length=6,
+        choices=STATUS_CHOICES,
+        default='ACTIVE',
+        blank=False,
+        null=False
+    )
+
+    closed_at = models.DateTimeField(blank=True, null=True)
+
+    # popularity counters, kept up to date with F() increments by the bid
+    # path and favorites; recount_item_popularity repairs any drift
+    bid_count = models.PositiveIntegerField(default=0)
+    unique_bidder_count = models.PositiveIntegerField(default=0)
+    watcher_count = models.PositiveIntegerField(default=0)
+
+    # bumped by bids, favorites, edits, shipping / payment updates and
+    # closing; the item detail ETag is built from it
+    version = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'category', 'condition']),
+            # the item list only shows live auctions, so each of its sorts gets
+            # an index over active items ending in id, the keyset tie-breaker
+            models.Index(fields=['end_time', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_end_idx'),
+            models.Index(fields=['current_bid', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_bid_idx'),
+            models.Index(fields=['start_time', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_start_idx'),
+            models.Index(fields=['created_at', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_created_idx'),
+            models.Index(fields=['bid_count', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_bid_count_idx'),
+            models.Index(fields=['unique_bidder_count', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_bidders_idx'),
+            models.Index(fields=['watcher_count', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_watchers_idx'),
+            # category pages sorted by end time or age
+            models.Index(fields=['category', 'end_time', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_cat_end_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], condition=models.Q(status='ACTIVE'),
+                         name='item_active_cat_created_idx'),
+            # seller pages: owner plus status (active, sold or failed)
+            models.Index(fields=['owner', 'status', 'created_at', 'id'],
+                         name='item_owner_status_idx'),
+            # auctions closed since the price index watermark
+            models.Index(fields=['closed_at'], condition=models.Q(closed_at__isnull=False),
+                         name='item_closed_idx'),
+        ]
+
+
+class SimilarItem(models.Model):
+    """One of the nearest neighbours of an active item.
+
+    Rebuilt offline by the build_similar_items command; rank 1 is the most
+    similar item.
+    """
+    item = models.ForeignKey(
+        Item,
+        related_name="similar_items",
+        on_delete=models.CASCADE
+    )
+    similar = models.ForeignKey(
+        Item,
+        related_name="similar_to",
+        on_delete=models.CASCADE
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # also the index the neighbours of an item are read from
+            models.UniqueConstraint(
+                fields=['item', 'rank'], name='unique_similar_item_rank'),
+        ]
+
+
+class PriceIndex(models.Model):
+    """Realized prices of closed auctions of one category and condition.
+
+    Maintained incrementally by the build_price_index command: the
+    counters and the price histogram only grow, and the quantiles are
+    read off the histogram after every run. closed_through is the
+    watermark, auctions closed before it are already counted.
+    """
+    category = models.CharField(choices=Item_Categories.choices(), blank=False, null=False)
+    condition = models.CharField(max_length=4, choices=[('USED', 'Used'), ('NEW', 'New')])
+
+    closed_count = models.PositiveIntegerField(default=0)
+    sold_count = models.PositiveIntegerField(default=0)
+    # sums over sold auctions, for the means
+    price_total = models.FloatField(default=0)
+    price_ratio_total = models.FloatField(default=0)  # final / initial bid
+    # sold auctions per price bin, bins as in items.price_index.BIN_EDGES
+    histogram = models.JSONField(default=list)
+
+    mean_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    p10 = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    p25 = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    p50 = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    p75 = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    p90 = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+
+    closed_through = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['category', 'condition'], name='unique_price_index_group'),
+        ]
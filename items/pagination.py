@@ -0,0 +1,158 @@
+"""Keyset pagination for the item list.
+
+A page is fetched with a WHERE clause on the sort key of the last row seen
+instead of an OFFSET, so reading page 500 costs the same as reading page 1,
+and rows inserted or removed while a client pages through the list do not
+shift the pages it has not read yet. Every ordering ends with the item id,
+which makes the order total and the position of a row unambiguous.
+
+NULLs in the sort field (items without a bid yet, when sorting by
+current_bid) sort as if they were larger than any value, which matches the
+default NULL ordering of PostgreSQL for both directions.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def keyset_ordering(field, descending, reverse=False):
+    """Ordering expressions for a list sorted on `field`, tie-broken by id"""
+    if descending != reverse:
+        return [F(field).desc(nulls_first=True), F('id').desc()]
+    return [F(field).asc(nulls_last=True), F('id').asc()]
+
+
+class ItemCursorPagination:
+    cursor_query_param = 'cursor'
+    page_size = 10
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, field, descending, page_size=None):
+        """`field` is the item field or annotation the list is sorted on"""
+        self.field = field
+        self.descending = descending
+        if page_size:
+            self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        value, pk, reverse = self.decode_cursor(request)
+
+        field = self.get_field(queryset)
+        if value is not None:
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        if pk is not None:
+            # moving forward past a row means moving to larger keys for an
+            # ascending list; walking backwards flips that
+            queryset = queryset.filter(self.beyond(
+                value, pk, greater=self.descending == reverse, nullable=field.null))
+
+        rows = list(queryset.order_by(
+            *keyset_ordering(self.field, self.descending, reverse))[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        # there is always a page on the side we came from
+        self.has_next = has_more if not reverse else pk is not None
+        self.has_previous = pk is not None if not reverse else has_more
+        return rows
+
+    def beyond(self, value, pk, greater, nullable):
+        """Rows that come after (value, pk) in the given key direction"""
+        field = self.field
+        if greater:
+            if value is None:
+                return Q(**{f'{field}__isnull': True, 'id__gt': pk})
+            after = Q(**{f'{field}__gte': value}) & (
+                Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+            if nullable:
+                after |= Q(**{f'{field}__isnull': True})
+            return after
+
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'id__lt': pk}) | Q(
+                **{f'{field}__isnull': False})
+        return Q(**{f'{field}__lte': value}) & (
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+
+    def get_field(self, queryset):
+        """Model field behind the sort key, for parsing cursors"""
+        try:
+            return queryset.model._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            return queryset.query.annotations[self.field].output_field
+
+    def get_paginated_response(self, data, count=None):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if count is not None:
+            response['count'] = count
+        response['results'] = data
+        return Response(response)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        # rows are items, or dicts when the list is read with .values()
+        if isinstance(row, dict):
+            value, pk = row[self.field], row['id']
+        else:
+            value, pk = getattr(row, self.field), row.id
+        position = {
+            'o': self.ordering_key,
+            'v': None if value is None else _dump(value),
+            'id': pk,
+        }
+        if reverse:
+            position['r'] = 1
+        cursor = base64.urlsafe_b64encode(
+            json.dumps(position, separators=(',', ':')).encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """Return (value, id, reverse) from the request cursor, or a first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, None, False
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if position['o'] != self.ordering_key:
+                raise ValueError('cursor belongs to another ordering')
+            return position['v'], int(position['id']), bool(position.get('r'))
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @property
+    def ordering_key(self):
+        return f'-{self.field}' if self.descending else self.field
+
+
+def _dump(value):
+    # datetimes and decimals go into the cursor as strings, the sort field
+    # parses them back when the cursor is used
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
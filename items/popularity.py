@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from authentication.models import Favorite
+from bids.models import Bid
+from .list_cache import invalidate_item_list
+from .models import Item
+
+COUNTERS = ('bid_count', 'unique_bidder_count', 'watcher_count')
+
+
+def _actual_counts(ids):
+    """{item id: (bids, unique bidders, watchers)} counted from the source rows"""
+    bids = {
+        row['item_id']: (row['bids'], row['bidders'])
+        for row in Bid.objects.filter(item_id__in=ids).order_by().values('item_id').annotate(
+            bids=Count('id'), bidders=Count('user_id', distinct=True))
+    }
+    watchers = dict(Favorite.objects.filter(item_id__in=ids).order_by().values(
+        'item_id').annotate(watchers=Count('id')).values_list('item_id', 'watchers'))
+    return {item_id: (*bids.get(item_id, (0, 0)), watchers.get(item_id, 0)) for item_id in ids}
+
+
+def recount_popularity(batch_size=1000, dry_run=False):
+    """Recompute the popularity counters of every item and fix the wrong ones.
+
+    Walks the items by id in batches. Each batch is row locked while it is
+    counted, so bids and favorites landing meanwhile wait instead of being
+    lost. Returns the number of (checked, fixed) items.
+    """
+    checked = fixed = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            stored = {
+                item_id: counters for item_id, *counters in Item.objects.select_for_update().filter(
+                    id__gt=last_id).order_by('id').values_list('id', *COUNTERS)[:batch_size]
+            }
+            if not stored:
+                break
+            actual = _actual_counts(list(stored))
+            wrong = [Item(id=item_id, **dict(zip(COUNTERS, counts)), version=F('version') + 1)
+                     for item_id, counts in actual.items() if list(counts) != stored[item_id]]
+            if wrong and not dry_run:
+                Item.objects.bulk_update(wrong, [*COUNTERS, 'version'])
+
+        checked += len(stored)
+        fixed += len(wrong)
+        last_id = max(stored)
+
+    if fixed and not dry_run:
+        invalidate_item_list()
+    return checked, fixed
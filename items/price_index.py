@@ -0,0 +1,221 @@
+"""Realized-price index of closed auctions, per category and condition.
+
+`update_price_index` reads the auctions closed since the last run in
+chunks of PRICE_INDEX_CHUNK_SIZE rows. It turns each chunk into NumPy
+arrays and adds it to per-group counters and price histograms with
+bincount, every group at once. Only one chunk is in memory at a time.
+
+The counters are sums and the histograms are counts, so a run only has
+to add the new auctions to what PriceIndex already holds. Quantiles are
+then interpolated from the merged histograms, whose bins are log spaced
+(about 12% wide). Auctions are taken up to PRICE_INDEX_SETTLE_DELAY
+seconds ago: close_auctions stamps each batch with the time its
+transaction started, so waiting for that batch to commit means no auction
+can still appear behind the watermark, however long the whole sweep takes.
+
+A failed auction can be relisted and close again, with a later closed_at.
+Relisting (and deleting) a closed item calls `uncount_closed` first, which
+takes the earlier closure back out of the index if a run already counted
+it, so every item is counted once, for its latest closure, just as a
+--full rebuild counts it.
+"""
+import math
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from common.utils import Item_Categories
+from .models import Item, PriceIndex
+
+CATEGORIES = [category.name for category in Item_Categories]
+CONDITIONS = ['NEW', 'USED']
+GROUPS = [(category, condition) for category in CATEGORIES for condition in CONDITIONS]
+
+# $1 to $100,000 in 100 log spaced bins; prices outside go in the end bins
+BIN_EDGES = np.logspace(0, 5, 101)
+BINS = len(BIN_EDGES) - 1
+QUANTILES = {'p10': 0.10, 'p25': 0.25, 'p50': 0.50, 'p75': 0.75, 'p90': 0.90}
+
+_category_codes = {name: code for code, name in enumerate(CATEGORIES)}
+_condition_codes = {name: code for code, name in enumerate(CONDITIONS)}
+
+
+class Totals:
+    """Per-group counters, one array element per entry of GROUPS"""
+
+    def __init__(self):
+        self.closed = np.zeros(len(GROUPS), dtype=np.int64)
+        self.sold = np.zeros(len(GROUPS), dtype=np.int64)
+        self.price = np.zeros(len(GROUPS))
+        self.ratio = np.zeros(len(GROUPS))
+        self.histogram = np.zeros((len(GROUPS), BINS), dtype=np.int64)
+
+    def add_chunk(self, rows):
+        """Count a list of (category, condition, status, initial, final) rows"""
+        count = len(rows)
+        groups = np.fromiter(
+            (_category_codes[category] * len(CONDITIONS) + _condition_codes[condition]
+             for category, condition, _, _, _ in rows), dtype=np.int64, count=count)
+        sold = np.fromiter((status == 'SOLD' and final is not None
+                            for _, _, status, _, final in rows), dtype=bool, count=count)
+        initial = np.fromiter((initial for _, _, _, initial, _ in rows), dtype=np.float64, count=count)
+        final = np.fromiter((final or 0 for _, _, _, _, final in rows), dtype=np.float64, count=count)
+
+        self.closed += np.bincount(groups, minlength=len(GROUPS))
+        groups, initial, final = groups[sold], initial[sold], final[sold]
+        self.sold += np.bincount(groups, minlength=len(GROUPS))
+        self.price += np.bincount(groups, weights=final, minlength=len(GROUPS))
+        self.ratio += np.bincount(groups, weights=final / np.maximum(initial, 0.01),
+                                  minlength=len(GROUPS))
+        bins = np.clip(np.searchsorted(BIN_EDGES, final, side='right') - 1, 0, BINS - 1)
+        self.histogram += np.bincount(
+            groups * BINS + bins, minlength=len(GROUPS) * BINS).reshape(len(GROUPS), BINS)
+
+    def add_stored(self, rows):
+        """Add the counters already stored in PriceIndex rows"""
+        for row in rows:
+            group = GROUPS.index((row.category, row.condition))
+            self.closed[group] += row.closed_count
+            self.sold[group] += row.sold_count
+            self.price[group] += row.price_total
+            self.ratio[group] += row.price_ratio_total
+            if len(row.histogram) == BINS:
+                self.histogram[group] += row.histogram
+
+    def subtract(self, other):
+        """Take the counters of another Totals back out"""
+        self.closed -= other.closed
+        self.sold -= other.sold
+        self.price -= other.price
+        self.ratio -= other.ratio
+        self.histogram -= other.histogram
+
+
+def histogram_quantiles(histogram, quantile):
+    """Price at `quantile` of every histogram row, NaN for empty rows.
+
+    Interpolates log-linearly inside the bin holding the quantile.
+    """
+    cumulative = histogram.cumsum(axis=1)
+    total = cumulative[:, -1]
+    target = quantile * total
+    bins = np.minimum((cumulative < target[:, None]).sum(axis=1), BINS - 1)
+    rows = np.arange(len(histogram))
+    before = np.where(bins > 0, cumulative[rows, bins - 1], 0)
+    inside = np.maximum(histogram[rows, bins], 1)
+    fraction = np.clip((target - before) / inside, 0, 1)
+    low, high = np.log(BIN_EDGES[bins]), np.log(BIN_EDGES[bins + 1])
+    return np.where(total > 0, np.exp(low + fraction * (high - low)), np.nan)
+
+
+def _money(value):
+    return None if math.isnan(value) else Decimal(f'{value:.2f}')
+
+
+def _chunks(rows, size):
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _save(totals, groups, closed_through):
+    """Write the counters and summaries of `groups` (indexes into GROUPS)"""
+    quantiles = {name: histogram_quantiles(totals.histogram, q) for name, q in QUANTILES.items()}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = totals.price / totals.sold
+    PriceIndex.objects.bulk_create(
+        [PriceIndex(
+            category=GROUPS[group][0], condition=GROUPS[group][1],
+            closed_count=int(totals.closed[group]), sold_count=int(totals.sold[group]),
+            price_total=float(totals.price[group]),
+            price_ratio_total=float(totals.ratio[group]),
+            histogram=totals.histogram[group].tolist(),
+            mean_price=_money(means[group]),
+            **{name: _money(values[group]) for name, values in quantiles.items()},
+            closed_through=closed_through,
+        ) for group in groups],
+        update_conflicts=True,
+        unique_fields=['category', 'condition'],
+        update_fields=[
+            'closed_count', 'sold_count', 'price_total', 'price_ratio_total', 'histogram',
+            'mean_price', *QUANTILES, 'closed_through', 'updated_at',
+        ],
+    )
+
+
+def update_price_index(full=False, now=None):
+    """Add the auctions closed since the watermark, return how many"""
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.PRICE_INDEX_SETTLE_DELAY)
+    totals = Totals()
+    with transaction.atomic():
+        # a second run waits here for this one
+        stored = list(PriceIndex.objects.select_for_update())
+        if full:
+            stored = []
+        watermark = max((row.closed_through for row in stored), default=None)
+        totals.add_stored(stored)
+
+        closed = Item.objects.filter(
+            status__in=['SOLD', 'FAILED'], closed_at__isnull=False, closed_at__lt=cutoff,
+            category__in=CATEGORIES, condition__in=CONDITIONS)
+        if watermark:
+            closed = closed.filter(closed_at__gte=watermark)
+        rows = closed.values_list(
+            'category', 'condition', 'status', 'initial_bid', 'current_bid'
+        ).iterator(chunk_size=settings.PRICE_INDEX_CHUNK_SIZE)
+
+        added = 0
+        for chunk in _chunks(rows, settings.PRICE_INDEX_CHUNK_SIZE):
+            totals.add_chunk(chunk)
+            added += len(chunk)
+
+        _save(totals, range(len(GROUPS)), cutoff)
+    return added
+
+
+def uncount_closed(item):
+    """Take a closed item out of the index before it is relisted or deleted.
+
+    Must run in the transaction that relists or deletes it. Does nothing
+    if no run has counted the item yet.
+    """
+    if item.status not in ('SOLD', 'FAILED') or item.closed_at is None:
+        return
+    if (item.category, item.condition) not in GROUPS:
+        return
+    # waits for a running update_price_index, which may be counting the item
+    row = PriceIndex.objects.select_for_update().filter(
+        category=item.category, condition=item.condition).first()
+    if row is None or item.closed_at >= row.closed_through:
+        return
+
+    totals, closure = Totals(), Totals()
+    totals.add_stored([row])
+    closure.add_chunk([(item.category, item.condition, item.status,
+                        item.initial_bid, item.current_bid)])
+    totals.subtract(closure)
+    _save(totals, [GROUPS.index((item.category, item.condition))], row.closed_through)
+
+
+def price_index_entry(row):
+    """Response representation of a PriceIndex row"""
+    return {
+        'category': row.category,
+        'condition': row.condition,
+        'closed_auctions': row.closed_count,
+        'sold_auctions': row.sold_count,
+        'sell_through_rate': round(row.sold_count / row.closed_count, 4) if row.closed_count else None,
+        'mean_price': row.mean_price,
+        'mean_price_to_start_ratio':
+            round(row.price_ratio_total / row.sold_count, 4) if row.sold_count else None,
+        'quantiles': {name: getattr(row, name) for name in QUANTILES},
+        'histogram': {
+            'edges': [round(float(edge), 2) for edge in BIN_EDGES],
+            'counts': row.histogram,
+        },
+        'closed_through': row.closed_through,
+    }
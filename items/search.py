@@ -0,0 +1,108 @@
+"""Full-text search over item names and descriptions.
+
+On PostgreSQL items_item carries a generated `search_vector` tsvector
+column (the name weighted above the description) with a GIN index, so the
+database keeps it current on every insert and update. On SQLite the same
+text is mirrored into the `items_item_fts` FTS5 table by triggers. Both are
+created by migration 0015_item_search and are not model fields; the
+queries below are the only code that reads them.
+
+SQLite alters a table by copying it into a new one, which drops its
+triggers, so any later migration touching items_item would silently stop
+the FTS table from following it. `ensure_fts_triggers` runs after every
+migrate and puts missing triggers back, rebuilding the index if it had to.
+
+`search_items` narrows any item queryset to the matches and annotates a
+`search_rank` (higher is better), so search combines with the other list
+filters in a single query.
+"""
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+
+FTS_TRIGGERS = {
+    'items_item_fts_insert': """
+        CREATE TRIGGER items_item_fts_insert AFTER INSERT ON items_item BEGIN
+            INSERT INTO items_item_fts(rowid, item_name, description)
+            VALUES (new.id, new.item_name, new.description);
+        END
+    """,
+    'items_item_fts_delete': """
+        CREATE TRIGGER items_item_fts_delete AFTER DELETE ON items_item BEGIN
+            INSERT INTO items_item_fts(items_item_fts, rowid, item_name, description)
+            VALUES ('delete', old.id, old.item_name, old.description);
+        END
+    """,
+    'items_item_fts_update': """
+        CREATE TRIGGER items_item_fts_update AFTER UPDATE OF item_name, description ON items_item BEGIN
+            INSERT INTO items_item_fts(items_item_fts, rowid, item_name, description)
+            VALUES ('delete', old.id, old.item_name, old.description);
+            INSERT INTO items_item_fts(rowid, item_name, description)
+            VALUES (new.id, new.item_name, new.description);
+        END
+    """,
+}
+
+
+def search_items(queryset, q):
+    """Filter `queryset` to items matching `q` and annotate `search_rank`"""
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, q)
+    return _search_sqlite(queryset, q)
+
+
+def _search_postgres(queryset, q):
+    # websearch_to_tsquery accepts raw user input: quotes, OR and -word.
+    # ts_rank_cd returns a float4, the cast keeps the rank exact when it
+    # travels through a pagination cursor and back
+    return queryset.filter(RawSQL(
+        '"items_item"."search_vector" @@ websearch_to_tsquery(%s, %s)',
+        [SEARCH_CONFIG, q], output_field=BooleanField(),
+    )).annotate(search_rank=RawSQL(
+        'ts_rank_cd("items_item"."search_vector", websearch_to_tsquery(%s, %s))::float8',
+        [SEARCH_CONFIG, q], output_field=FloatField(),
+    ))
+
+
+def _search_sqlite(queryset, q):
+    match = fts5_query(q)
+    if not match:
+        return queryset.none()
+    # bm25 is lower for better matches, flip it so higher ranks first
+    return queryset.filter(RawSQL(
+        '"items_item"."id" IN (SELECT "rowid" FROM "items_item_fts" WHERE "items_item_fts" MATCH %s)',
+        [match], output_field=BooleanField(),
+    )).annotate(search_rank=RawSQL(
+        'SELECT -bm25("items_item_fts", 10.0, 1.0) FROM "items_item_fts" '
+        'WHERE "items_item_fts" MATCH %s AND "items_item_fts"."rowid" = "items_item"."id"',
+        [match], output_field=FloatField(),
+    ))
+
+
+def fts5_query(q):
+    """Quote every word of `q` so FTS5 treats it as text, not query syntax"""
+    words = re.findall(r'\w+', q)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def ensure_fts_triggers(using='default', **kwargs):
+    """post_migrate handler re-creating the SQLite FTS triggers a rebuild dropped"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE name LIKE 'items_item_fts%'")
+        existing = {name for _, name in cursor.fetchall()}
+        # before migration 0015 there is nothing to keep in sync
+        if 'items_item_fts' not in existing:
+            return
+        missing = [name for name in FTS_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(FTS_TRIGGERS[name])
+        if missing:
+            # rows written while the triggers were gone
+            cursor.execute("INSERT INTO items_item_fts(items_item_fts) VALUES ('rebuild')")
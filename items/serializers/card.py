@@ -0,0 +1,114 @@
+"""Item cards for list pages.
+
+A card carries only what a list tile shows, and the list reads it with
+`.values()` straight into dicts: no description, shipping or payment data,
+and only the first image and its derivatives, which the database extracts
+from the JSON lists.
+Converting a row is a single pass over a field table built at import time,
+producing the same JSON as the matching DRF fields without their per-field
+machinery.
+"""
+from django.db.models.fields.json import KeyTransform
+from django.utils import timezone
+
+from ..images import image_urls
+
+
+def _datetime(value):
+    # same output as rest_framework.fields.DateTimeField
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _decimal(value):
+    # DecimalField values come back from the database at their scale
+    return None if value is None else str(value)
+
+
+def _plain(value):
+    return value
+
+
+def _image_urls(row):
+    return image_urls(row['image'], row['image_sizes']) if row['image'] else None
+
+
+# response key -> (values() name, converter); converters without a name
+# get the whole row
+CARD_FIELDS = {
+    'id': ('id', _plain),
+    'item_name': ('item_name', _plain),
+    'owner': ('owner_id', _plain),
+    'category': ('category', _plain),
+    'condition': ('condition', _plain),
+    'initial_bid': ('initial_bid', _decimal),
+    'current_bid': ('current_bid', _decimal),
+    'highest_bidder': ('highest_bidder_id', _plain),
+    'start_time': ('start_time', _datetime),
+    'end_time': ('end_time', _datetime),
+    'status': ('status', _plain),
+    'created_at': ('created_at', _datetime),
+    'bid_count': ('bid_count', _plain),
+    'unique_bidder_count': ('unique_bidder_count', _plain),
+    'watcher_count': ('watcher_count', _plain),
+    'image': ('image', _plain),
+    # per-size URLs of the first image, built from the whole row
+    'image_urls': (None, _image_urls),
+}
+
+# extra fields of a card in the user's bid list
+BID_CARD_FIELDS = {
+    **CARD_FIELDS,
+    'is_winning': ('is_winning', _plain),
+    'my_max_bid': ('my_max_bid', _decimal),
+}
+
+# extra field of a card in an item's similar items
+SIMILAR_CARD_FIELDS = {
+    **CARD_FIELDS,
+    'similarity': ('similarity', _plain),
+}
+
+
+class ItemCardSerializer:
+    fields = CARD_FIELDS
+
+    def __init__(self, fields=None):
+        self._table = tuple(
+            (key, source, convert) for key, (source, convert) in (fields or self.fields).items())
+
+    def columns(self):
+        """Names to pass to .values() after `card_queryset`"""
+        return [source for _, source, _ in self._table if source] + ['image_sizes']
+
+    def to_representation(self, row):
+        return {key: convert(row[source]) if source else convert(row)
+                for key, source, convert in self._table}
+
+    def serialize(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+def card_queryset(queryset, serializer, sort_field):
+    """Read `queryset` as card rows.
+
+    Only the card columns, the first image and the sort key are selected;
+    cursor pagination reads the sort key back from each row.
+    """
+    columns = serializer.columns()
+    if sort_field not in columns:
+        columns.append(sort_field)
+    return queryset.annotate(
+        image=KeyTransform(0, 'images'),
+        image_sizes=KeyTransform(0, 'image_derivatives'),
+    ).values(*columns)
+
+
+item_cards = ItemCardSerializer()
+bid_cards = ItemCardSerializer(BID_CARD_FIELDS)
+similar_cards = ItemCardSerializer(SIMILAR_CARD_FIELDS)
@@ -1,12 +1,38 @@
 from rest_framework import serializers
+from ..images import image_urls
 from ..models import Item
 from django.utils import timezone
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class UpdateFieldsMixin:
+    """Save updates with update_fields limited to the validated fields.
+
+    The bid path and favorites write the item's counters with F()
+    expressions; a full-row save would put back the values read here.
+    """
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+
+class ItemSerializer(UpdateFieldsMixin, serializers.ModelSerializer):
+    # per-size URLs of every entry of images
+    image_urls = serializers.SerializerMethodField()
+
     class Meta:
         model = Item
-        fields = '__all__'
+        exclude = ('image_derivatives',)
+        read_only_fields = ('status', 'closed_at', 'version',
+                            'bid_count', 'unique_bidder_count', 'watcher_count')
+
+    def get_image_urls(self, item):
+        images = item.images or []
+        derivatives = item.image_derivatives or []
+        return [image_urls(image, derivatives[i] if i < len(derivatives) else None)
+                for i, image in enumerate(images)]
 
     def validate_end_time(self, value):
         """Ensure end_time is not in the past."""
@@ -15,12 +41,14 @@ class ItemSerializer(serializers.ModelSerializer):
                 "End time cannot be earlier than the current time.")
         return value
 
-class ItemBidUpdateSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Item
-        fields =[ 'bid_history_json', 'highest_bidder', 'current_bid']
+class UserBidItemSerializer(ItemSerializer):
+    """Item in a user's bid list, with where the user stands on it"""
+    is_winning = serializers.BooleanField(read_only=True)
+    my_max_bid = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True)
+
 
-class ShippingAndPaymentSerializer(serializers.ModelSerializer):
+class ShippingAndPaymentSerializer(UpdateFieldsMixin, serializers.ModelSerializer):
     shipping_info = serializers.JSONField()
 
     class Meta:
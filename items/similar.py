@@ -0,0 +1,192 @@
+"""Precomputed "similar items" for the item detail page.
+
+`build_similar_items` describes every active item as a row of float32
+features:
+
+- category one-hot
+- condition (new or used)
+- log price
+- log height, width, length and weight
+- manufacture year
+- item_name tokens hashed into NAME_HASH_DIMS buckets
+
+Numeric columns are standardized, each feature group is scaled by its
+weight in FEATURE_WEIGHTS, and rows are L2 normalized, so a dot product of
+two rows is their cosine similarity.
+
+The matrix lives in a memory mapped temporary file and the neighbours are
+found exactly, in blocks: SIMILAR_ITEMS_BLOCK_SIZE items at a time are
+compared with SIMILAR_ITEMS_CHUNK_SIZE candidates at a time, keeping a
+running top k per item. Only a block, a chunk and their score matrix are
+in memory at once, whatever the number of items. Each finished block
+replaces the SimilarItem rows of its items in one transaction.
+"""
+import math
+import re
+import tempfile
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Coalesce
+
+from common.utils import Item_Categories
+from .models import Item, SimilarItem
+
+CATEGORIES = {category.name: column for column, category in enumerate(Item_Categories)}
+NUMERIC = ('condition', 'price', 'height', 'width', 'length', 'weight', 'year')
+NAME_HASH_DIMS = 32
+
+# relative weight of each feature group in the similarity
+FEATURE_WEIGHTS = {'category': 2.0, 'numeric': 1.0, 'name': 1.5}
+
+_numeric = slice(len(CATEGORIES), len(CATEGORIES) + len(NUMERIC))
+_name = slice(_numeric.stop, _numeric.stop + NAME_HASH_DIMS)
+FEATURES = _name.stop
+
+TOKEN = re.compile(r'\w+')
+
+
+def _log(value):
+    return math.log1p(max(float(value), 0))
+
+
+def item_features(row, out):
+    """Write the raw features of one values_list() row into `out`"""
+    _, category, condition, price, height, width, length, weight, year, name = row
+    out[:] = 0
+    if category in CATEGORIES:
+        out[CATEGORIES[category]] = 1
+    out[_numeric] = (
+        condition == 'NEW', _log(price or 0),
+        _log(height), _log(width), _log(length), _log(weight),
+        # a missing year becomes the mean once the column is standardized
+        np.nan if year is None else year,
+    )
+    tokens = TOKEN.findall((name or '').lower())
+    for token in tokens:
+        # crc32 rather than hash() so buckets do not change between runs
+        out[_name.start + zlib.crc32(token.encode()) % NAME_HASH_DIMS] += 1 / math.sqrt(len(tokens))
+
+
+def _item_rows():
+    return Item.objects.filter(status='ACTIVE').order_by('id').values_list(
+        'id', 'category', 'condition', Coalesce('current_bid', 'initial_bid'),
+        'height', 'width', 'length', 'weight', 'manufacture_year', 'item_name',
+    )
+
+
+def build_matrix(path, chunk_size):
+    """Load the features of every active item into a memory mapped file.
+
+    Returns (item ids, matrix), rows in the order of the ids.
+    """
+    count = _item_rows().count()
+    ids = np.empty(count, dtype=np.int64)
+    matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(count, FEATURES))
+
+    n = -1
+    for n, row in enumerate(_item_rows().iterator(chunk_size=chunk_size)):
+        # items listed while reading are left for the next run
+        if n == count:
+            break
+        ids[n] = row[0]
+        item_features(row, matrix[n])
+    count = n + 1
+    ids, matrix = ids[:count], matrix[:count]
+
+    # standardize the numeric columns, one chunk of rows at a time
+    numeric = _numeric
+    total = np.zeros(len(NUMERIC))
+    squares = np.zeros(len(NUMERIC))
+    present = np.zeros(len(NUMERIC))
+    for start in range(0, count, chunk_size):
+        block = matrix[start:start + chunk_size, numeric].astype(np.float64)
+        known = ~np.isnan(block)
+        total += np.where(known, block, 0).sum(axis=0)
+        squares += np.where(known, block ** 2, 0).sum(axis=0)
+        present += known.sum(axis=0)
+    mean = total / np.maximum(present, 1)
+    std = np.sqrt(np.maximum(squares / np.maximum(present, 1) - mean ** 2, 0))
+    std[std == 0] = 1
+
+    weights = np.ones(FEATURES, dtype=np.float32)
+    weights[:len(CATEGORIES)] = FEATURE_WEIGHTS['category']
+    weights[numeric] = FEATURE_WEIGHTS['numeric'] / math.sqrt(len(NUMERIC))
+    weights[_name] = FEATURE_WEIGHTS['name']
+    for start in range(0, count, chunk_size):
+        block = matrix[start:start + chunk_size]
+        values = (block[:, numeric] - mean) / std
+        block[:, numeric] = np.nan_to_num(values, nan=0.0)
+        block *= weights
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block /= np.where(norms == 0, 1, norms)
+    matrix.flush()
+    return ids, matrix
+
+
+def _top(scores, k):
+    """Column indexes and values of the k highest scores of every row"""
+    if scores.shape[1] <= k:
+        columns = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        return columns, scores
+    columns = np.argpartition(scores, -k, axis=1)[:, -k:]
+    return columns, np.take_along_axis(scores, columns, axis=1)
+
+
+def nearest_neighbours(matrix, start, stop, k, chunk_size):
+    """Exact top k rows of `matrix` for rows start:stop, best first.
+
+    Returns (row indexes, scores), both (stop - start, k); missing
+    neighbours, when there are fewer than k other rows, have index -1.
+    """
+    queries = np.asarray(matrix[start:stop])
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_columns = np.full((len(queries), k), -1, dtype=np.int64)
+
+    for chunk_start in range(0, len(matrix), chunk_size):
+        chunk = np.asarray(matrix[chunk_start:chunk_start + chunk_size])
+        scores = queries @ chunk.T
+        # an item is not its own neighbour
+        overlap = np.arange(max(start, chunk_start), min(stop, chunk_start + len(chunk)))
+        scores[overlap - start, overlap - chunk_start] = -np.inf
+        # the chunk's own top k first, then merge the two small top k lists
+        columns, scores = _top(scores, k)
+        merged_columns = np.concatenate([best_columns, columns + chunk_start], axis=1)
+        keep, best_scores = _top(np.concatenate([best_scores, scores], axis=1), k)
+        best_columns = np.take_along_axis(merged_columns, keep, axis=1)
+
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_columns = np.take_along_axis(best_columns, order, axis=1)
+    best_columns[np.isneginf(best_scores)] = -1
+    return best_columns, best_scores
+
+
+def build_similar_items(k=None, block_size=None, chunk_size=None):
+    """Recompute the neighbours of every active item, return how many items"""
+    k = k or settings.SIMILAR_ITEMS_K
+    block_size = block_size or settings.SIMILAR_ITEMS_BLOCK_SIZE
+    chunk_size = chunk_size or settings.SIMILAR_ITEMS_CHUNK_SIZE
+
+    with tempfile.TemporaryDirectory() as directory:
+        ids, matrix = build_matrix(f'{directory}/features.npy', chunk_size)
+        for start in range(0, len(ids), block_size):
+            stop = min(start + block_size, len(ids))
+            columns, scores = nearest_neighbours(matrix, start, stop, k, chunk_size)
+            rows = [
+                SimilarItem(item_id=int(ids[start + i]), similar_id=int(ids[column]),
+                            rank=rank, score=round(float(score), 6))
+                for i in range(stop - start)
+                for rank, (column, score) in enumerate(zip(columns[i], scores[i]), start=1)
+                if column >= 0
+            ]
+            with transaction.atomic():
+                SimilarItem.objects.filter(item_id__in=ids[start:stop].tolist()).delete()
+                SimilarItem.objects.bulk_create(rows, batch_size=5000)
+        del matrix
+
+    # items that closed since the last run
+    SimilarItem.objects.exclude(item__status='ACTIVE').delete()
+    return len(ids)
@@ -0,0 +1,541 @@
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common.testing import auth_header, make_item, make_user
+from bids.models import Bid
+from bids.services import place_bid
+from items import trending
+from items.closing import close_ended_auctions
+from items.models import Item, SimilarItem
+from items.serializers.card import BID_CARD_FIELDS, CARD_FIELDS
+from items.serializers.common import ItemSerializer, ShippingAndPaymentSerializer
+from items.similar import build_similar_items
+from items.trending import get_trending, refresh_trending
+
+
+
+# the list filters on condition unless told otherwise
+LIST_URL = '/bidhub/marketplace/?condition=all'
+
+
+class ItemApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('owner')
+        cls.bidder = make_user('bidder')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+
+class ItemUpdateTests(ItemApiTestCase):
+    def test_edit_keeps_counters_written_meanwhile(self):
+        item = make_item(self.owner)
+        # someone favorites the item between the read and the save
+        Item.objects.filter(pk=item.pk).update(watcher_count=F('watcher_count') + 3)
+        serializer = ItemSerializer(item, data={'item_name': 'renamed'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(version=F('version') + 1)
+
+        item.refresh_from_db()
+        self.assertEqual(item.item_name, 'renamed')
+        self.assertEqual(item.watcher_count, 3)
+        self.assertEqual(item.version, 1)
+
+    def test_shipping_update_keeps_counters_written_meanwhile(self):
+        item = make_item(self.owner, status='SOLD', highest_bidder=self.bidder)
+        Item.objects.filter(pk=item.pk).update(watcher_count=5, bid_count=2)
+        serializer = ShippingAndPaymentSerializer(
+            item, data={'shipping_info': {'city': 'Oslo'}}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(version=F('version') + 1)
+
+        item.refresh_from_db()
+        self.assertEqual(item.shipping_info, {'city': 'Oslo'})
+        self.assertEqual((item.watcher_count, item.bid_count), (5, 2))
+
+    def test_put_updates_item(self):
+        item = make_item(self.owner)
+        response = self.client.put(f'/bidhub/marketplace/{item.id}/', {'item_name': 'renamed'},
+                                   format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['version'], 1)
+        item.refresh_from_db()
+        self.assertEqual(item.item_name, 'renamed')
+
+
+class ItemETagTests(ItemApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = make_item(self.owner)
+        self.url = f'/bidhub/marketplace/{self.item.id}/'
+
+    def test_etag_follows_the_version(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['ETag'], f'"{self.item.id}-0"')
+
+        self.client.put(self.url, {'item_name': 'renamed'}, format='json')
+        self.assertEqual(self.client.get(self.url)['ETag'], f'"{self.item.id}-1"')
+
+        place_bid(self.item.id, self.bidder, Decimal('11.00'))
+        self.assertEqual(self.client.get(self.url)['ETag'], f'"{self.item.id}-2"')
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            response = self.client.get(self.url, headers={'If-None-Match': if_none_match})
+            self.assertEqual(response.status_code, 304, if_none_match)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_update_or_bid_makes_the_etag_stale(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.put(self.url, {'item_name': 'renamed'}, format='json')
+        response = self.client.get(self.url, headers={'If-None-Match': f'W/{etag}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['item_name'], 'renamed')
+
+        etag = response['ETag']
+        place_bid(self.item.id, self.bidder, Decimal('11.00'))
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ItemCardTests(ItemApiTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_cards_match_the_full_item_fields(self):
+        item = make_item(self.owner, images=['https://cdn.example.com/a.jpg', 'https://cdn.example.com/b.jpg'],
+                         image_derivatives=[{'thumb': 'items/a-thumb.webp'}], watcher_count=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(item.id, self.bidder, Decimal('12.50'))
+        bare = make_item(self.owner, images=[])
+
+        full = {row['id']: row for row in self.client.get(LIST_URL).data['results']}
+        cards = {card['id']: card for card in self.client.get(f'{LIST_URL}&view=card').data['results']}
+        card = cards[item.id]
+        self.assertEqual(set(card), set(CARD_FIELDS))
+        for key in set(CARD_FIELDS) - {'image', 'image_urls'}:
+            self.assertEqual(card[key], full[item.id][key], key)
+        self.assertEqual(card['current_bid'], '12.50')
+        self.assertEqual(card['image'], 'https://cdn.example.com/a.jpg')
+        self.assertEqual(card['image_urls'], full[item.id]['image_urls'][0])
+        self.assertTrue(card['image_urls']['thumb'].endswith('items/a-thumb.webp'))
+        self.assertEqual(card['image_urls']['card'], 'https://cdn.example.com/a.jpg')
+        self.assertEqual((cards[bare.id]['image'], cards[bare.id]['image_urls']), (None, None))
+
+    def test_bid_list_cards(self):
+        item = make_item(self.owner)
+        place_bid(item.id, self.bidder, Decimal('11.00'))
+        self.client.force_authenticate(self.bidder)
+        card, = self.client.get(f'{LIST_URL}&userbids=true&view=card').data['results']
+        self.assertEqual(set(card), set(BID_CARD_FIELDS))
+        self.assertEqual((card['id'], card['is_winning'], card['my_max_bid']), (item.id, True, '11.00'))
+
+    def test_cards_with_cursor_pagination(self):
+        for i in range(12):
+            make_item(self.owner, item_name=f'card {i}', watcher_count=i % 3)
+        url = f'{LIST_URL}&view=card&paginate=cursor&watchers=desc&page_size=10'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append(response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual([len(page) for page in pages], [10, 2])
+        self.assertTrue(all(set(card) == set(CARD_FIELDS) for page in pages for card in page))
+        self.assertEqual([card['id'] for page in pages for card in page],
+                         list(Item.objects.order_by('-watcher_count', '-id').values_list('id', flat=True)))
+
+
+class RelistTests(ItemApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = make_item(self.owner, status='FAILED', closed_at=timezone.now(),
+                              end_time=timezone.now() - timedelta(hours=1))
+
+    def test_new_end_time_relists_failed_auction(self):
+        end_time = timezone.now() + timedelta(days=3)
+        response = self.client.put(f'/bidhub/marketplace/{self.item.id}/',
+                                   {'end_time': end_time.isoformat()}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.status, 'ACTIVE')
+        self.assertIsNone(self.item.closed_at)
+        self.assertEqual(self.item.end_time, end_time)
+
+    def test_other_edits_of_closed_auction_are_rejected(self):
+        response = self.client.put(f'/bidhub/marketplace/{self.item.id}/',
+                                   {'item_name': 'renamed'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('relisted', response.data['detail'])
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.item_name, self.item.status), ('test item', 'FAILED'))
+
+    def test_end_time_in_the_past_is_rejected(self):
+        response = self.client.put(f'/bidhub/marketplace/{self.item.id}/',
+                                   {'end_time': (timezone.now() - timedelta(days=1)).isoformat()},
+                                   format='json')
+        self.assertEqual(response.status_code, 422)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.status, 'FAILED')
+
+
+class TrendingTests(ItemApiTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.item = make_item(self.owner)
+        Bid.objects.create(bid=Decimal('11.00'), user_id=self.bidder, item_id=self.item)
+
+    def test_feed_is_built_on_first_request(self):
+        response = self.client.get('/bidhub/marketplace/trending/')
+        self.assertEqual([card['id'] for card in response.data['results']], [self.item.id])
+
+    def test_stale_feed_is_served_while_another_request_rebuilds(self):
+        stale = refresh_trending()
+        stale['fresh_until'] = 0
+        cache.set(trending.CACHE_KEY, stale)
+        cache.add(trending.LOCK_KEY, 1)
+        with mock.patch.object(trending, 'rank_trending') as rank:
+            self.assertEqual(get_trending()['results'][0]['id'], self.item.id)
+        rank.assert_not_called()
+
+        cache.delete(trending.LOCK_KEY)
+        self.assertGreater(get_trending()['fresh_until'], time.time())
+        self.assertIsNone(cache.get(trending.LOCK_KEY))
+
+
+class ItemListPaginationTests(ItemApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(23):
+            # ties and items without a bid yet, which sort last ascending
+            make_item(cls.owner, current_bid=None if i % 5 == 0 else Decimal(10 + i % 4))
+
+    def expected_ids(self):
+        items = Item.objects.filter(status='ACTIVE').values_list('current_bid', 'id')
+        return [pk for _, pk in sorted(items, key=lambda row: (row[0] is None, row[0] or 0, row[1]))]
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([card['id'] for card in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_cursor_pages_follow_the_keyset_order(self):
+        pages = self.walk(f'{LIST_URL}&paginate=cursor&bid=asc&page_size=10&view=card', 'next')
+        self.assertEqual([len(page) for page in pages], [10, 10, 3])
+        self.assertEqual(sum(pages, []), self.expected_ids())
+
+    def test_previous_links_walk_back_over_the_same_pages(self):
+        url = f'{LIST_URL}&paginate=cursor&bid=asc&page_size=10'
+        forward = self.walk(url, 'next')
+        last = self.client.get(url)
+        while last.data['next']:
+            last = self.client.get(last.data['next'])
+        backward = self.walk(last.data['previous'], 'previous')
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_new_items_do_not_shift_pages_already_reached(self):
+        first = self.client.get(f'{LIST_URL}&paginate=cursor&page_size=10')
+        # newest first, so a new item goes before the cursor
+        make_item(self.owner)
+        second = self.client.get(first.data['next'])
+        expected = list(Item.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        ids = [item['id'] for item in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, expected[1:21])
+
+    def test_count_only_when_asked(self):
+        response = self.client.get(f'{LIST_URL}&paginate=cursor')
+        self.assertNotIn('count', response.data)
+        response = self.client.get(f'{LIST_URL}&paginate=cursor&count=true')
+        self.assertEqual(response.data['count'], 23)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{LIST_URL}&paginate=cursor&cursor=nonsense')
+        self.assertEqual(response.status_code, 404)
+        first = self.client.get(f'{LIST_URL}&paginate=cursor&bid=asc')
+        cursor = first.data['next'].split('cursor=')[1]
+        # a cursor of one ordering is refused by another
+        response = self.client.get(f'{LIST_URL}&paginate=cursor&end=asc&cursor={cursor}')
+        self.assertEqual(response.status_code, 404)
+
+
+class ItemListCacheTests(ItemApiTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.item = make_item(self.owner)
+        self.anonymous = APIClient()
+
+    def test_anonymous_pages_are_shared(self):
+        first = self.anonymous.get(f'{LIST_URL}&category=all&page_size=10')
+        second = self.anonymous.get(f'{LIST_URL}&page_size=10&category=all')
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first.data, second.data)
+
+    def test_signed_in_users_bypass_the_cache(self):
+        self.anonymous.get(LIST_URL)
+        response = self.client.get(LIST_URL)
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_accepted_bid_invalidates_pages(self):
+        self.anonymous.get(LIST_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(self.item.id, self.bidder, Decimal('11.00'))
+        response = self.anonymous.get(LIST_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['current_bid'], '11.00')
+
+    def test_edit_invalidates_pages(self):
+        self.anonymous.get(LIST_URL)
+        self.client.put(f'/bidhub/marketplace/{self.item.id}/', {'item_name': 'renamed'}, format='json')
+        response = self.anonymous.get(LIST_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['item_name'], 'renamed')
+
+
+class ItemSearchTests(ItemApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.in_name = make_item(cls.owner, item_name='Vintage brass lamp', category='HOME',
+                                condition='USED', description='Works, needs a new bulb')
+        cls.in_description = make_item(cls.owner, item_name='Desk light', category='HOME',
+                                       condition='NEW', description='A modern lamp for the desk')
+        cls.elsewhere = make_item(cls.owner, item_name='Lamp shaped toy', category='TOYS',
+                                  condition='NEW', description='Plastic')
+        make_item(cls.owner, item_name='Bicycle', description='Road bike')
+
+    def search(self, query):
+        response = self.client.get(f'{LIST_URL}&q={query}')
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_matches_words_of_name_and_description(self):
+        self.assertEqual(set(self.search('lamp')),
+                         {self.in_name.id, self.in_description.id, self.elsewhere.id})
+        # stemmed, and items created after migrating are indexed too
+        item = make_item(self.owner, item_name='Two lamps')
+        self.assertIn(item.id, self.search('lamp'))
+        self.assertEqual(self.search('kayak'), [])
+
+    def test_name_matches_rank_above_description_matches(self):
+        ranked = self.search('lamp')
+        self.assertLess(ranked.index(self.in_name.id), ranked.index(self.in_description.id))
+
+    def test_combines_with_category_and_condition(self):
+        self.assertEqual(self.search('lamp&category=HOME&condition=NEW'), [self.in_description.id])
+        response = self.client.get('/bidhub/marketplace/?q=lamp&category=TOYS&condition=all')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.elsewhere.id])
+
+    def test_edits_and_deletes_follow_the_index(self):
+        Item.objects.filter(pk=self.elsewhere.pk).update(item_name='Robot toy')
+        self.assertNotIn(self.elsewhere.id, self.search('lamp'))
+        self.in_name.delete()
+        self.assertEqual(self.search('brass'), [])
+
+
+class ExportTests(ItemApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.items = [make_item(cls.owner, item_name=f'export {i}') for i in range(5)]
+
+    def test_csv_export_under_wsgi(self):
+        response = self.client.get('/bidhub/marketplace/export/items/?file_format=csv')
+        self.assertFalse(response.is_async)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,item_name,'))
+        self.assertEqual([line.split(',')[1] for line in lines[1:]],
+                         [item.item_name for item in self.items])
+
+    async def test_ndjson_export_streams_under_asgi(self):
+        response = await AsyncClient().get('/bidhub/marketplace/export/items/',
+                                           headers=auth_header(self.owner))
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row['item_name'] for row in rows], [item.item_name for item in self.items])
+
+    @override_settings(STREAMING_BATCH_LINES=2)
+    async def test_asgi_export_sends_rows_before_reading_them_all(self):
+        read = []
+
+        def rows():
+            for n in range(1000):
+                read.append(n)
+                yield (n,)
+
+        with mock.patch('items.views.export_rows', return_value=(('id',), rows())):
+            response = await AsyncClient().get('/bidhub/marketplace/export/items/',
+                                               headers=auth_header(self.owner))
+            chunks = aiter(response.streaming_content)
+            first = await anext(chunks)
+        self.assertEqual(first, b'{"id": 0}\n{"id": 1}\n')
+        self.assertEqual(len(read), 2)
+
+
+class ImportTests(ItemApiTestCase):
+    url = '/bidhub/marketplace/import/'
+
+    def rows(self, count):
+        now = timezone.now()
+        return [dict(item_name=f'imported {i}', category='BOOKS', condition='USED', height=1,
+                     width=1, length=1, weight=1, description='imported', initial_bid='5.00',
+                     start_time=now.isoformat(), end_time=(now + timedelta(days=1)).isoformat())
+                for i in range(count)]
+
+    def upload(self, rows, name='items.ndjson'):
+        content = ''.join(row if isinstance(row, str) else json.dumps(row) + '\n' for row in rows)
+        return SimpleUploadedFile(name, content.encode())
+
+    def report(self, response):
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_row_errors_are_reported_and_the_rest_imported(self):
+        good, bad_price, _ = self.rows(3)
+        bad_price['initial_bid'] = 'free'
+        response = self.client.post(self.url, {'file': self.upload(
+            [good, 'not json\n', bad_price, '[1, 2]\n', self.rows(1)[0]])})
+        report = self.report(response)
+
+        self.assertEqual([entry.get('row') for entry in report], [2, 3, 4, None])
+        self.assertIn('Invalid JSON', report[0]['errors']['non_field_errors'][0])
+        self.assertEqual(list(report[1]['errors']), ['initial_bid'])
+        self.assertEqual(report[2]['errors'], {'non_field_errors': ['Row must be a JSON object']})
+        self.assertEqual(report[-1], {'created': 2, 'failed': 3})
+        self.assertEqual(Item.objects.filter(owner=self.owner, item_name__startswith='imported').count(), 2)
+
+    def test_csv_upload(self):
+        rows = self.rows(2)
+        header = ','.join(rows[0])
+        lines = [header] + [','.join(str(value) for value in row.values()) for row in rows]
+        response = self.client.post(self.url, {'file': self.upload(['\n'.join(lines) + '\n'], 'items.csv')})
+        self.assertEqual(self.report(response), [{'created': 2, 'failed': 0}])
+
+    @override_settings(ITEM_IMPORT_CHUNK_SIZE=2)
+    def test_rows_are_committed_in_chunks(self):
+        with mock.patch('items.bulk_import.Item.objects.bulk_create',
+                        side_effect=Item.objects.bulk_create) as bulk_create:
+            response = self.client.post(self.url, {'file': self.upload(self.rows(5))})
+            self.assertEqual(self.report(response), [{'created': 5, 'failed': 0}])
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+
+    def test_unknown_format_is_refused(self):
+        response = self.client.post(f'{self.url}?file_format=xml', {'file': self.upload(self.rows(1))})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_report_streams_under_asgi(self):
+        response = await AsyncClient().post(self.url, {'file': self.upload(self.rows(2))},
+                                            headers=auth_header(self.owner))
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(json.loads(b''.join(chunks)), {'created': 2, 'failed': 0})
+
+
+class FacetTests(ItemApiTestCase):
+    url = '/bidhub/marketplace/facets/'
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.lamp = make_item(self.owner, item_name='lamp', category='HOME', condition='USED')
+        make_item(self.owner, category='HOME', condition='NEW')
+        make_item(self.owner, category='TOYS', condition='NEW')
+        make_item(self.owner, category='TOYS', status='SOLD')
+
+    def counts(self, query=''):
+        facets = self.client.get(f'{self.url}?{query}').data
+        return (facets['total'],
+                {entry['value']: entry['count'] for entry in facets['categories'] if entry['count']},
+                {entry['value']: entry['count'] for entry in facets['conditions'] if entry['count']})
+
+    def test_counts_of_active_items(self):
+        self.assertEqual(self.counts(), (3, {'HOME': 2, 'TOYS': 1}, {'NEW': 2, 'USED': 1}))
+        # each group honours the filter of the other one
+        self.assertEqual(self.counts('category=HOME&condition=NEW'),
+                         (1, {'HOME': 1, 'TOYS': 1}, {'NEW': 1, 'USED': 1}))
+        self.assertEqual(self.counts(f'owner={self.bidder.id}'), (0, {}, {}))
+        self.assertEqual(self.counts('q=lamp'), (1, {'HOME': 1}, {'USED': 1}))
+
+    def test_item_writes_refresh_the_counts(self):
+        self.counts()
+        now = timezone.now()
+        response = self.client.post('/bidhub/marketplace/new/', dict(
+            item_name='new', category='BOOKS', condition='NEW', height=1, width=1, length=1,
+            weight=1, description='new', initial_bid='5.00', start_time=now.isoformat(),
+            end_time=(now + timedelta(days=1)).isoformat()), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counts()[1], {'BOOKS': 1, 'HOME': 2, 'TOYS': 1})
+
+        self.client.put(f'/bidhub/marketplace/{self.lamp.id}/', {'category': 'TOYS'}, format='json')
+        self.assertEqual(self.counts()[1], {'BOOKS': 1, 'HOME': 1, 'TOYS': 2})
+
+        self.client.delete(f'/bidhub/marketplace/{self.lamp.id}/')
+        self.assertEqual(self.counts()[1], {'BOOKS': 1, 'HOME': 1, 'TOYS': 1})
+
+    def test_bid_and_close_refresh_the_counts(self):
+        self.counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(self.lamp.id, self.bidder, Decimal('11.00'))
+        self.assertEqual(self.counts()[0], 3)
+
+        Item.objects.filter(pk=self.lamp.pk).update(end_time=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(close_ended_auctions(), (1, 0))
+        self.assertEqual(self.counts(), (2, {'HOME': 1, 'TOYS': 1}, {'NEW': 2}))
+
+
+class SimilarItemsTests(ItemApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lamp = make_item(cls.owner, item_name='Vintage brass lamp', category='HOME',
+                             condition='USED', initial_bid=Decimal('40.00'))
+        cls.neighbour = make_item(cls.owner, item_name='Brass table lamp', category='HOME',
+                                  condition='USED', initial_bid=Decimal('35.00'))
+        cls.unrelated = make_item(cls.owner, item_name='Mountain bike', category='SPORTS',
+                                  condition='NEW', initial_bid=Decimal('400.00'),
+                                  height=40, width=20, length=70, weight=15)
+        cls.same_category = make_item(cls.owner, item_name='Cast iron pan', category='HOME',
+                                      condition='NEW', initial_bid=Decimal('25.00'))
+
+    def test_same_category_neighbour_ranks_above_an_unrelated_item(self):
+        self.assertEqual(build_similar_items(k=3), 4)
+        ranked = list(SimilarItem.objects.filter(item=self.lamp).order_by('rank')
+                      .values_list('similar_id', flat=True))
+        self.assertEqual(ranked, [self.neighbour.id, self.same_category.id, self.unrelated.id])
+
+    def test_blocks_and_chunks_do_not_change_the_neighbours(self):
+        build_similar_items(k=2)
+        whole = list(SimilarItem.objects.order_by('item_id', 'rank').values_list('item_id', 'similar_id'))
+        build_similar_items(k=2, block_size=1, chunk_size=3)
+        self.assertEqual(
+            list(SimilarItem.objects.order_by('item_id', 'rank').values_list('item_id', 'similar_id')),
+            whole)
+
+    def test_endpoint_returns_neighbours_best_first(self):
+        build_similar_items(k=3)
+        Item.objects.filter(pk=self.same_category.pk).update(status='SOLD')
+        results = self.client.get(f'/bidhub/marketplace/{self.lamp.id}/similar/').data['results']
+        self.assertEqual([card['id'] for card in results], [self.neighbour.id, self.unrelated.id])
+        self.assertGreater(results[0]['similarity'], results[1]['similarity'])
@@ -0,0 +1,139 @@
+import socket
+from io import BytesIO
+from unittest import mock
+
+import requests
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from common.testing import make_item, make_user
+from items.images import UnsafeImage, check_url, fetch_url, make_derivatives, process_item_images
+from items.models import Item
+
+IN_MEMORY_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def resolves_to(*addresses):
+    """getaddrinfo answering each call with the next address"""
+    answers = iter(addresses)
+    return lambda host, port, *args: [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (next(answers), port))]
+
+
+def respond(status=200, body=b'', headers=None):
+    """Stand-in for HTTPAdapter.send, answering every request the same"""
+    def send(request, **kwargs):
+        response = requests.Response()
+        response.status_code = status
+        response.raw = BytesIO(body)
+        response.headers.update(headers or {})
+        response.request = request
+        return response
+    return send
+
+
+def png(width=2000, height=1000, color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImageFetchTests(SimpleTestCase):
+    def test_refuses_private_and_loopback_urls(self):
+        for url in ('http://127.0.0.1/a.jpg', 'http://localhost/a.jpg', 'http://[::1]/a.jpg',
+                    'http://10.1.2.3/a.jpg', 'http://192.168.0.10/a.jpg',
+                    'http://169.254.169.254/latest/meta-data/', 'ftp://example.com/a.jpg',
+                    'file:///etc/passwd'):
+            with self.assertRaises(UnsafeImage, msg=url):
+                check_url(url)
+
+    def test_refuses_a_host_with_any_private_address(self):
+        answer = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 80))
+                  for address in ('93.184.216.34', '10.0.0.5')]
+        with mock.patch('socket.getaddrinfo', return_value=answer):
+            with self.assertRaises(UnsafeImage):
+                check_url('http://cdn.example.com/a.jpg')
+
+    @override_settings(ITEM_IMAGE_ALLOWED_HOSTS=['cdn.example.com'])
+    def test_refuses_hosts_outside_the_allow_list(self):
+        with self.assertRaises(UnsafeImage):
+            check_url('https://elsewhere.example.com/a.jpg')
+
+    def test_connects_to_the_address_that_was_checked(self):
+        # a second lookup would rebind the name to loopback
+        with mock.patch('socket.getaddrinfo', side_effect=resolves_to('93.184.216.34', '127.0.0.1')), \
+                mock.patch('requests.adapters.HTTPAdapter.send',
+                           side_effect=respond(body=b'picture')) as send:
+            self.assertEqual(fetch_url('https://cdn.example.com/a.jpg'), b'picture')
+
+        request = send.call_args.args[0]
+        self.assertEqual(request.url, 'https://93.184.216.34/a.jpg')
+        self.assertEqual(request.headers['Host'], 'cdn.example.com')
+
+    def test_refuses_redirects_to_private_addresses(self):
+        redirect = respond(302, headers={'Location': 'http://internal.example.com/secret'})
+        with mock.patch('socket.getaddrinfo', side_effect=resolves_to('93.184.216.34', '10.0.0.5')), \
+                mock.patch('requests.adapters.HTTPAdapter.send', side_effect=redirect) as send:
+            with self.assertRaises(UnsafeImage):
+                fetch_url('https://cdn.example.com/a.jpg')
+        self.assertEqual(send.call_count, 1)
+
+    @override_settings(ITEM_IMAGE_MAX_BYTES=4)
+    def test_cuts_off_large_bodies(self):
+        with mock.patch('socket.getaddrinfo', side_effect=resolves_to('93.184.216.34')), \
+                mock.patch('requests.adapters.HTTPAdapter.send',
+                           side_effect=respond(body=b'too large')):
+            with self.assertRaises(UnsafeImage):
+                fetch_url('https://cdn.example.com/a.jpg')
+
+
+class DerivativeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('owner')
+
+    def setUp(self):
+        # a new empty storage for every test
+        storages = self.settings(STORAGES=IN_MEMORY_STORAGES)
+        storages.enable()
+        self.addCleanup(storages.disable)
+
+    def test_every_size_is_stored(self):
+        names = make_derivatives(png())
+        self.assertEqual(set(names), {'thumb', 'card', 'full'})
+        for size, edges in (('thumb', (160, 80)), ('card', (480, 240)), ('full', (1600, 800))):
+            with default_storage.open(names[size]) as stored, Image.open(stored) as image:
+                self.assertEqual((image.format, image.size), ('JPEG', edges))
+
+    def test_the_same_picture_is_processed_once(self):
+        default_storage.save('uploads/a.png', ContentFile(png()))
+        default_storage.save('uploads/b.png', ContentFile(png(color='blue')))
+        first = make_item(self.owner, images=['uploads/a.png'])
+        second = make_item(self.owner, images=['uploads/a.png', 'uploads/b.png'])
+
+        with mock.patch('PIL.Image.open', wraps=Image.open) as image_open:
+            process_item_images(first.id)
+            process_item_images(second.id)
+        # a second picture only for b.png
+        self.assertEqual(image_open.call_count, 2)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.image_derivatives[0], first.image_derivatives[0])
+        self.assertNotEqual(second.image_derivatives[1], first.image_derivatives[0])
+        self.assertEqual((first.version, second.version), (1, 1))
+
+    @override_settings(ITEM_IMAGE_MAX_PIXELS=100)
+    def test_images_over_max_pixels_are_not_decoded(self):
+        with self.assertRaises(UnsafeImage):
+            make_derivatives(png())
+
+        default_storage.save('uploads/a.png', ContentFile(png()))
+        item = make_item(self.owner, images=['uploads/a.png', 'https://127.0.0.1/a.jpg'])
+        with self.assertLogs('items.images', 'ERROR'):
+            process_item_images(item.id)
+        self.assertEqual(Item.objects.get(pk=item.pk).image_derivatives, [None, None])
@@ -1,3 +1,103 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common.testing import make_item, make_user
+from items.closing import close_ended_auctions
+from items.models import Item, PriceIndex
+from items.price_index import update_price_index
+
+
+def index_snapshot():
+    return {
+        (row.category, row.condition): (
+            row.closed_count, row.sold_count, round(row.price_total, 6),
+            round(row.price_ratio_total, 6), row.histogram, row.mean_price, row.p50,
+        ) for row in PriceIndex.objects.all()
+    }
+
+
+class PriceIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('owner')
+        cls.bidder = make_user('bidder')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.now = timezone.now()
+
+    def closed_item(self, status, closed_at, price=None, category='BOOKS'):
+        return make_item(
+            self.owner, category=category, condition='USED', current_bid=price,
+            highest_bidder=self.bidder if status == 'SOLD' else None,
+            start_time=closed_at - timedelta(days=1), end_time=closed_at,
+            status=status, closed_at=closed_at)
+
+    def test_incremental_runs_match_full_rebuild(self):
+        earlier = self.now - timedelta(hours=2)
+        self.closed_item('SOLD', earlier, Decimal('50.00'))
+        self.closed_item('SOLD', earlier, Decimal('200.00'), category='TOYS')
+        relisted = self.closed_item('FAILED', earlier)
+        deleted = self.closed_item('FAILED', earlier)
+        self.assertEqual(update_price_index(now=self.now), 4)
+
+        # relisted, then sold the second time round
+        response = self.client.put(
+            f'/bidhub/marketplace/{relisted.id}/',
+            {'end_time': (self.now + timedelta(days=1)).isoformat()}, format='json')
+        self.assertEqual(response.status_code, 202)
+        Item.objects.filter(pk=relisted.pk).update(
+            status='SOLD', current_bid=Decimal('30.00'), highest_bidder=self.bidder,
+            closed_at=self.now + timedelta(minutes=1))
+        response = self.client.delete(f'/bidhub/marketplace/{deleted.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.closed_item('FAILED', self.now + timedelta(minutes=2))
+
+        later = self.now + timedelta(hours=1)
+        self.assertEqual(update_price_index(now=later), 2)
+        incremental = index_snapshot()
+        books = incremental[('BOOKS', 'USED')]
+        self.assertEqual(books[:3], (3, 2, 80.0))
+
+        update_price_index(full=True, now=later)
+        self.assertEqual(index_snapshot(), incremental)
+
+    def test_relisting_before_a_run_counts_only_the_last_closure(self):
+        item = self.closed_item('FAILED', self.now - timedelta(hours=2))
+        response = self.client.put(
+            f'/bidhub/marketplace/{item.id}/',
+            {'end_time': (self.now + timedelta(days=1)).isoformat()}, format='json')
+        self.assertEqual(response.status_code, 202)
+        Item.objects.filter(pk=item.pk).update(status='FAILED', closed_at=self.now)
+
+        update_price_index(now=self.now + timedelta(hours=1))
+        self.assertEqual(index_snapshot()[('BOOKS', 'USED')][:2], (1, 0))
+
+
+class CloseEndedAuctionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('owner')
+        cls.bidder = make_user('bidder')
+
+    def test_every_batch_is_stamped_when_it_commits(self):
+        started = timezone.now()
+        ended = [make_item(self.owner, start_time=started - timedelta(days=1),
+                           end_time=started - timedelta(minutes=n),
+                           highest_bidder=self.bidder if n % 2 else None) for n in range(1, 6)]
+        # every batch of a slow sweep takes ten minutes
+        clock = mock.Mock(now=mock.Mock(side_effect=[started + timedelta(minutes=10 * n) for n in range(4)]))
+        with mock.patch('items.closing.timezone', clock):
+            self.assertEqual(close_ended_auctions(batch_size=2), (3, 2))
 
-# Create your tests here.
+        # batches follow end_time
+        closed_at = Item.objects.filter(id__in=[item.id for item in ended]).order_by(
+            'end_time').values_list('closed_at', flat=True)
+        self.assertEqual(list(closed_at), [started + timedelta(minutes=minutes)
+                                           for minutes in (10, 10, 20, 20, 30)])
@@ -0,0 +1,149 @@
+import json
+import random
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from bids.models import UserItemBid
+from common.utils import Item_Categories
+from items.models import Item
+
+# tables the item list reads; a sequential scan of either one means the
+# query will get slower with every auction ever listed
+WATCHED_TABLES = {'items_item', 'bids_useritembid'}
+
+SORTS = ['', 'end=asc', 'end=desc', 'bid=asc', 'bid=desc', 'start=asc', 'start=desc',
+         'bids=desc', 'bidders=desc', 'watchers=desc']
+
+
+def seq_scans(plan):
+    """Tables read with a sequential scan anywhere in an EXPLAIN plan"""
+    found = set()
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in WATCHED_TABLES:
+        found.add(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found |= seq_scans(child)
+    return found
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'query plans are checked on PostgreSQL')
+class ItemListQueryPlanTests(TestCase):
+    """Every filter and sort of the item list must be served by an index"""
+
+    items = 20000
+    bids_per_user = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        now = timezone.now()
+        cls.sellers = User.objects.bulk_create(
+            [User(username=f'plan-seller-{i}', email=f'plan-seller-{i}@example.com')
+             for i in range(200)])
+        cls.bidder = User.objects.create(username='plan-bidder', email='plan-bidder@example.com')
+        categories = [category.name for category in Item_Categories]
+
+        items = []
+        for i in range(cls.items):
+            start = now - timedelta(days=rng.randint(0, 365))
+            # most of the table is auctions that closed long ago
+            status = 'ACTIVE' if i % 10 == 0 else rng.choice(['SOLD', 'FAILED'])
+            current_bid = Decimal(rng.randint(1, 5000)) if rng.random() < 0.8 else None
+            items.append(Item(
+                item_name=f'plan item {i}', owner=rng.choice(cls.sellers),
+                category=rng.choice(categories), condition=rng.choice(['NEW', 'USED']),
+                height=1, width=1, length=1, weight=1, description='seeded for query plans',
+                initial_bid=Decimal('1.00'), current_bid=current_bid, status=status,
+                start_time=start, end_time=start + timedelta(days=7),
+                bid_count=rng.randint(0, 60), unique_bidder_count=rng.randint(0, 20),
+                watcher_count=rng.randint(0, 200),
+            ))
+        Item.objects.bulk_create(items, batch_size=2000)
+
+        # the bidder under test plus a crowd of other bidders
+        item_ids = list(Item.objects.values_list('id', flat=True))
+        summaries = []
+        for user in [cls.bidder, *cls.sellers]:
+            summaries += [
+                UserItemBid(user_id=user, item_id_id=item_id, max_bid=Decimal('10.00'),
+                            last_bid_at=now - timedelta(minutes=rng.randint(0, 10000)),
+                            is_winning=rng.random() < 0.5)
+                for item_id in rng.sample(item_ids, cls.bids_per_user)
+            ]
+        UserItemBid.objects.bulk_create(summaries, batch_size=2000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE items_item')
+            cursor.execute('ANALYZE bids_useritembid')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.bidder)
+
+    def assert_indexed(self, params):
+        """Request the list and EXPLAIN every item query it ran"""
+        url = f'/bidhub/marketplace/?paginate=cursor&{params}'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or not WATCHED_TABLES & set(sql.replace('"', ' ').split()):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scanned = seq_scans(plan[0]['Plan'])
+            self.assertFalse(scanned, f'{url} scans {scanned} sequentially:\n{sql}')
+        return response.json()
+
+    def check_pages(self, params):
+        """First page and the page after it, which filters on the cursor"""
+        page = self.assert_indexed(params)
+        if page['next']:
+            cursor = page['next'].split('cursor=')[1].split('&')[0]
+            self.assert_indexed(f'{params}&cursor={cursor}')
+
+    def test_active_items(self):
+        for sort in SORTS:
+            with self.subTest(sort=sort):
+                self.check_pages(f'condition=all&{sort}')
+
+    def test_category(self):
+        for sort in SORTS:
+            with self.subTest(sort=sort):
+                self.check_pages(f'condition=all&category=ELECTRONICS&{sort}')
+
+    def test_category_and_condition(self):
+        for sort in SORTS:
+            with self.subTest(sort=sort):
+                self.check_pages(f'condition=USED&category=ELECTRONICS&{sort}')
+
+    def test_owner(self):
+        owner = self.sellers[0].id
+        for sort in SORTS:
+            with self.subTest(sort=sort):
+                self.check_pages(f'condition=all&owner={owner}&{sort}')
+
+    def test_user_bids(self):
+        for sort in SORTS:
+            with self.subTest(sort=sort):
+                self.check_pages(f'condition=all&userbids=true&{sort}')
+
+    def test_sold_and_failed(self):
+        self.client.force_authenticate(self.sellers[0])
+        for flag in ('sold', 'auctionFailed'):
+            with self.subTest(flag=flag):
+                self.check_pages(f'condition=all&{flag}=true')
+
+    def test_purchased(self):
+        self.check_pages('condition=all&purchased=true')
@@ -0,0 +1,114 @@
+"""The "trending now" feed.
+
+Every active item is scored by its time decayed bid velocity: each bid in
+the last TRENDING_WINDOW seconds counts exp(-ln 2 * age / half life), and
+the sum is scaled to bids per hour, so an item receiving a steady r bids
+an hour scores about r and a burst fades by half every TRENDING_HALF_LIFE.
+The scoring runs in NumPy over all the window's bids at once.
+
+`refresh_trending` stores the top TRENDING_SIZE items as ready to send
+item cards in the TRENDING_CACHE cache, fresh for TRENDING_REFRESH_INTERVAL
+seconds. The rank_trending_items command calls it on that interval, so
+serving the feed is a single cache read.
+
+If the job falls behind, the request finding the feed out of date rebuilds
+it, holding a lock taken with cache.add so only one request at a time does
+the ranking. The others keep serving the old feed, which is kept for
+TRENDING_STALE_TIMEOUT seconds for that reason.
+"""
+import math
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from bids.models import Bid
+from .models import Item
+from .serializers.card import card_queryset, item_cards
+
+CACHE_KEY = 'trending:items'
+LOCK_KEY = 'trending:rebuild'
+
+
+def _cache():
+    return caches[settings.TRENDING_CACHE]
+
+
+def score_bids(item_ids, ages, half_life):
+    """Decayed bids per hour of every item, from parallel arrays of bids.
+
+    Returns (unique item ids, their scores).
+    """
+    weights = np.exp(ages * (-math.log(2) / half_life))
+    items, inverse = np.unique(item_ids, return_inverse=True)
+    return items, np.bincount(inverse, weights=weights) * (3600 * math.log(2) / half_life)
+
+
+def top_items(items, scores, size):
+    """Indexes of the `size` highest scores, best first"""
+    if len(scores) > size:
+        candidates = np.argpartition(-scores, size - 1)[:size]
+    else:
+        candidates = np.arange(len(scores))
+    # highest score first, newer item first on ties
+    return candidates[np.lexsort((-items[candidates], -scores[candidates]))]
+
+
+def rank_trending(now=None, size=None):
+    """Return [(item id, score)] of the top active items, best first"""
+    now = now or timezone.now()
+    size = size or settings.TRENDING_SIZE
+    bids = Bid.objects.filter(
+        created_at__gte=now - timedelta(seconds=settings.TRENDING_WINDOW),
+        item_id__status='ACTIVE',
+        item_id__end_time__gt=now,
+    ).values_list('item_id', 'created_at')
+
+    rows = list(bids.iterator(chunk_size=10000))
+    if not rows:
+        return []
+    item_ids = np.fromiter((item_id for item_id, _ in rows), dtype=np.int64, count=len(rows))
+    stamp = now.timestamp()
+    ages = np.fromiter((stamp - created_at.timestamp() for _, created_at in rows),
+                       dtype=np.float64, count=len(rows))
+
+    items, scores = score_bids(item_ids, np.maximum(ages, 0), settings.TRENDING_HALF_LIFE)
+    best = top_items(items, scores, size)
+    return [(int(items[i]), float(scores[i])) for i in best]
+
+
+def refresh_trending(now=None):
+    """Rank the trending items and store the feed, return it"""
+    now = now or timezone.now()
+    ranking = rank_trending(now)
+    cards = {
+        card['id']: card for card in item_cards.serialize(card_queryset(
+            Item.objects.filter(id__in=[item_id for item_id, _ in ranking], status='ACTIVE'),
+            item_cards, 'id'))
+    }
+    feed = {
+        'generated_at': now.isoformat(),
+        'fresh_until': time.time() + settings.TRENDING_REFRESH_INTERVAL,
+        'results': [{**cards[item_id], 'trending_score': round(score, 4)}
+                    for item_id, score in ranking if item_id in cards],
+    }
+    _cache().set(CACHE_KEY, feed, settings.TRENDING_STALE_TIMEOUT)
+    return feed
+
+
+def get_trending():
+    """The stored feed, rebuilt by one request at a time once out of date"""
+    feed = _cache().get(CACHE_KEY)
+    if feed is not None and feed['fresh_until'] > time.time():
+        return feed
+    # the lock expires on its own if the rebuilding process dies
+    if not _cache().add(LOCK_KEY, 1, settings.TRENDING_REBUILD_LOCK_TIMEOUT):
+        # someone else is rebuilding, the old feed will do meanwhile
+        return feed or {'generated_at': None, 'results': []}
+    try:
+        return refresh_trending()
+    finally:
+        _cache().delete(LOCK_KEY)
@@ -1,11 +1,18 @@
 from django.urls import path
-from .views import ItemListView, ItemDetailView, CreateItem, UpdateShippingAndPaymentView
+from .views import ItemListView, ItemDetailView, ItemFacetsView, ItemListCacheStatsView, TrendingItemsView, SimilarItemsView, PriceIndexView, CreateItem, ImportItems, ExportSellerData, UpdateShippingAndPaymentView
 
 urlpatterns = [
     # Base item endpoints
     path('', ItemListView.as_view()),
     path('new/', CreateItem.as_view()),
+    path('import/', ImportItems.as_view()),
+    path('export/<str:kind>/', ExportSellerData.as_view()),
+    path('facets/', ItemFacetsView.as_view()),
+    path('trending/', TrendingItemsView.as_view()),
+    path('price-index/', PriceIndexView.as_view()),
+    path('cache-stats/', ItemListCacheStatsView.as_view()),
     path('<int:item_id>/', ItemDetailView.as_view()),
+    path('<int:item_id>/similar/', SimilarItemsView.as_view()),
     path('<int:item_id>/shipping-and-payment',
          UpdateShippingAndPaymentView.as_view()),
 ]
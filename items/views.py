@@ -1,15 +1,32 @@
+import json
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotAuthenticated, NotFound
 from rest_framework.pagination import PageNumberPagination
-from django.utils import timezone
 
-from .models import Item
-from bids.models import Bid
-from .serializers.common import ItemSerializer, ShippingAndPaymentSerializer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.cache import parse_etags
+
+from .models import Item, PriceIndex
+from .bulk_import import FORMATS, guess_format, import_items, read_rows
+from .export import EXPORTS, FORMATS as EXPORT_FORMATS, encode, export_rows
+from .facets import invalidate_facets, item_facets
+from .images import schedule_item_images
+from .list_cache import cache_page, get_cached_page, invalidate_item_list, list_cache_stats
+from .price_index import price_index_entry, uncount_closed
+from .pagination import ItemCursorPagination, keyset_ordering
+from .search import search_items
+from .trending import get_trending
+from bids.state import forget_state
+from common.streaming import streaming_response
+from .serializers.common import ItemSerializer, ShippingAndPaymentSerializer, UserBidItemSerializer
+from .serializers.card import bid_cards, card_queryset, item_cards, similar_cards
 from .serializers.populated import PopulatedItemSerializer
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly, IsAuthenticated
 
 class ItemPagination(PageNumberPagination):
     page_size = 10
@@ -21,41 +38,56 @@ class ItemListView(APIView):
     permission_classes = (IsAuthenticatedOrReadOnly,)
     pagination_class = ItemPagination
     allowed_page_sizes = [10, 20, 40, 50, 100]  # allowed choices for page_size
+    # lists of the signed in user's own items, bids and favorites
+    user_lists = ('userbids', 'favorites', 'purchased', 'sold', 'auctionFailed')
 
     # GET All Items
     def get(self, request):
+        """Get filtered list of items, shared between anonymous visitors"""
+        if not request.user.is_anonymous:
+            return self.list_items(request)
+
+        # never answered, nor cached, for anonymous visitors
+        if any(request.query_params.get(name, 'false') != 'false' for name in self.user_lists):
+            raise NotAuthenticated()
+
+        key, data = get_cached_page(request)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK, headers={'X-Cache': 'HIT'})
+        response = self.list_items(request)
+        if response.status_code == status.HTTP_200_OK:
+            cache_page(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list_items(self, request):
         """Get filtered list of items with comprehensive search options"""
         category = request.query_params.get(
             'category', 'all')  # Default to 'all'
         condition = request.query_params.get('condition', 'none')
         # logic to filter by seller/user when needed
         owner = request.query_params.get('owner', 'none')
+        search = request.query_params.get('q', '').strip()
         sort_by_sold = request.query_params.get("sold", 'false')
-        sort_by_end = request.query_params.get("end", 'none')
-        sort_by_bid = request.query_params.get("bid", 'none')
-        sort_by_start = request.query_params.get("start", 'none')
         sort_by_user_bids = request.query_params.get("userbids", 'false')
         sort_by_user_favorites = request.query_params.get("favorites", 'false')
         sort_by_purchased = request.query_params.get('purchased', 'false')
         sort_by_auction_failed = request.query_params.get('auctionFailed', 'false')
         user = request.user
 
-        if request.user.is_anonymous != True:
-            favorites = user.favorites or []
-
         if sort_by_user_bids != 'false':
-            user_bids = Bid.objects.filter(user_id=user).select_related(
-                'item_id').prefetch_related('item_id__bids')
-            bidded_items = user_bids.values_list(
-                'item_id', flat=True).distinct()
-            items = Item.objects.filter(
-                id__in=bidded_items).select_related('owner')
+            # one row per item from the user's bid summaries, most recent bid first
+            items = Item.objects.filter(bidder_summaries__user_id=user).annotate(
+                is_winning=F('bidder_summaries__is_winning'),
+                my_max_bid=F('bidder_summaries__max_bid'),
+                last_bid_at=F('bidder_summaries__last_bid_at'),
+            )
         elif sort_by_user_favorites != 'false':
-            items = Item.objects.filter(id__in=favorites)
+            items = Item.objects.filter(favorited_by__user_id=user.id)
         elif sort_by_purchased != 'false':
             items = Item.objects.filter(
                 highest_bidder=user,
-                end_time__lt=timezone.now()
+                status='SOLD'
             )
 
         else:
@@ -65,17 +97,15 @@ class ItemListView(APIView):
         if sort_by_sold != "false":
             items = Item.objects.filter(
                 owner=user,
-                highest_bidder__isnull=False,
-                end_time__lt=timezone.now()
+                status='SOLD'
             )
         elif sort_by_auction_failed != "false":
             items = Item.objects.filter(
                 owner=user,
-                highest_bidder__isnull=True,
-                end_time__lt=timezone.now()
+                status='FAILED'
             )
         elif sort_by_purchased == 'false':
-            items = items.filter(end_time__gt=timezone.now())
+            items = items.filter(status='ACTIVE')
 
         if category != 'all':
             items = items.filter(category=category)
@@ -84,22 +114,19 @@ class ItemListView(APIView):
         if owner != "none":
             owner = int(owner)
             items = items.filter(owner_id=owner)
+        if search:
+            items = search_items(items, search)
 
-        if sort_by_end != 'none':
-            if sort_by_end == 'asc':
-                items = items.order_by("end_time")
-            elif sort_by_end == 'desc':
-                items = items.order_by("-end_time")
-        if sort_by_bid != 'none':
-            if sort_by_bid == 'asc':
-                items = items.order_by("current_bid")
-            elif sort_by_bid == 'desc':
-                items = items.order_by("-current_bid")
-        if sort_by_start != 'none':
-            if sort_by_start == 'asc':
-                items = items.order_by("start_time")
-            elif sort_by_start == 'desc':
-                items = items.order_by("-start_time")
+        # sold and auctionFailed replace the bid list with the user's own items
+        bid_list = (sort_by_user_bids != 'false' and sort_by_sold == 'false'
+                    and sort_by_auction_failed == 'false')
+        sort_field, descending = self.get_ordering(request, bid_list, bool(search))
+
+        # view=card reads only what a list tile shows
+        cards = None
+        if request.query_params.get('view') == 'card':
+            cards = bid_cards if bid_list else item_cards
+            items = card_queryset(items, cards, sort_field)
 
         # sanitize page_size param and apply allowed sizes
         page_size_param = request.query_params.get('page_size')
@@ -113,18 +140,127 @@ class ItemListView(APIView):
         else:
             page_size_val = None
 
+        if request.query_params.get('paginate') == 'cursor':
+            # keyset pages, counting the whole list only when asked to
+            paginator = ItemCursorPagination(sort_field, descending, page_size_val)
+            count = items.count() if request.query_params.get('count') == 'true' else None
+            page = paginator.paginate_queryset(items, request, view=self)
+            return paginator.get_paginated_response(
+                self.serialize_page(page, bid_list, cards), count)
+
         paginator = self.pagination_class()
         if page_size_val:
             paginator.page_size = page_size_val
 
+        items = items.order_by(*keyset_ordering(sort_field, descending))
         page = paginator.paginate_queryset(items, request, view=self)
-        serializer = ItemSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginator.get_paginated_response(self.serialize_page(page, bid_list, cards))
+
+    def serialize_page(self, page, bid_list, cards=None):
+        if cards is not None:
+            return cards.serialize(page)
+        if bid_list:
+            return UserBidItemSerializer(page, many=True).data
+        return ItemSerializer(page, many=True).data
+
+    def get_ordering(self, request, bid_list, search=False):
+        """Return the field to sort on and whether it sorts descending.
+
+        start wins over bid, which wins over end, which wins over the
+        popularity sorts (watchers, bidders, bids). Without any of them search
+        results come best match first, a bid list most recently bid on first
+        and everything else newest first.
+        """
+        if search:
+            ordering = ('search_rank', True)
+        elif bid_list:
+            ordering = ('last_bid_at', True)
+        else:
+            ordering = ('created_at', True)
+        for param, field in (('bids', 'bid_count'), ('bidders', 'unique_bidder_count'),
+                             ('watchers', 'watcher_count'), ('end', 'end_time'),
+                             ('bid', 'current_bid'), ('start', 'start_time')):
+            direction = request.query_params.get(param, 'none')
+            if direction in ('asc', 'desc'):
+                ordering = (field, direction == 'desc')
+        return ordering
+
+
+class ItemListCacheStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        """Get hit and miss counts of the anonymous item list cache"""
+        return Response(list_cache_stats(), status=status.HTTP_200_OK)
+
+
+class ItemFacetsView(APIView):
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+
+    def get(self, request):
+        """Get per-category and per-condition counts of active items"""
+        owner = request.query_params.get('owner')
+        if owner is not None:
+            try:
+                owner = int(owner)
+            except ValueError:
+                return Response({"detail": "owner must be a user id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        facets = item_facets(
+            category=request.query_params.get('category', 'all'),
+            condition=request.query_params.get('condition', 'all'),
+            owner=owner,
+            search=request.query_params.get('q', '').strip(),
+        )
+        return Response(facets, status=status.HTTP_200_OK)
+
+
+class TrendingItemsView(APIView):
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+
+    def get(self, request):
+        """Get the cards of the items with the fastest recent bidding"""
+        try:
+            limit = int(request.query_params.get('limit', settings.TRENDING_SIZE))
+        except ValueError:
+            return Response({"detail": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        feed = get_trending()
+        return Response({
+            'generated_at': feed['generated_at'],
+            'results': feed['results'][:max(limit, 0)],
+        }, status=status.HTTP_200_OK)
 
-    def get_queryset(self):
-        qs = Item.objects.all()
-        # ...existing filters...
-        return qs.order_by('-created_at', '-id')
+
+class SimilarItemsView(APIView):
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+
+    def get(self, request, item_id):
+        """Get the cards of the active items most similar to this one"""
+        # one read of the item's precomputed neighbours, in rank order
+        neighbours = Item.objects.filter(
+            similar_to__item_id=item_id, status='ACTIVE'
+        ).annotate(
+            similarity=F('similar_to__score'),
+        ).order_by('similar_to__rank')
+        rows = card_queryset(neighbours, similar_cards, 'id')
+        return Response({'results': similar_cards.serialize(rows)}, status=status.HTTP_200_OK)
+
+
+class PriceIndexView(APIView):
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+
+    def get(self, request):
+        """Get realized prices of closed auctions per category and condition"""
+        rows = PriceIndex.objects.filter(closed_count__gt=0).order_by('category', 'condition')
+        category = request.query_params.get('category', 'all')
+        condition = request.query_params.get('condition', 'all')
+        if category != 'all':
+            rows = rows.filter(category=category)
+        if condition != 'all':
+            rows = rows.filter(condition=condition)
+        return Response({'results': [price_index_entry(row) for row in rows]},
+                        status=status.HTTP_200_OK)
 
 
 class CreateItem(APIView):
@@ -139,12 +275,79 @@ class CreateItem(APIView):
         try:
             item_to_add.is_valid(raise_exception=True)
             item_to_add.save()
+            schedule_item_images(item_to_add.instance)
+            invalidate_facets()
+            invalidate_item_list()
             return Response(item_to_add.data, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response(e.__dict__ if hasattr(e, '__dict__') else str(e),
                             status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
 
+def item_etag(item_id, version):
+    """Strong ETag of an item, changing whenever its version does"""
+    return f'"{item_id}-{version}"'
+
+
+def etag_matches(etag, if_none_match):
+    """Weak comparison of If-None-Match with `etag`, as RFC 9110 asks for GET.
+
+    Proxies and gzip middleware weaken ETags, so a client may send back
+    W/"<id>-<version>" for a representation it still has.
+    """
+    if if_none_match.strip() == '*':
+        return True
+    return etag.removeprefix('W/') in (tag.removeprefix('W/') for tag in parse_etags(if_none_match))
+
+
+class ImportItems(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """Create many items from an uploaded CSV or NDJSON file"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Upload a CSV or NDJSON file as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        # ?format= is taken by DRF's renderer override
+        file_format = request.query_params.get('file_format') or guess_format(upload.name)
+        if file_format not in FORMATS:
+            return Response({"detail": f"file_format must be one of {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # the report streams out while rows are still being imported
+        report = import_items(read_rows(upload.file, file_format), request.user)
+        return streaming_response(
+            request, (json.dumps(entry) + '\n' for entry in report),
+            content_type='application/x-ndjson',
+        )
+
+
+class ExportSellerData(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, kind):
+        """Stream the user's items, bids on their items or sales as NDJSON or CSV"""
+        if kind not in EXPORTS:
+            raise NotFound(detail="Unknown export")
+        # ?format= is taken by DRF's renderer override
+        file_format = request.query_params.get('file_format', 'ndjson')
+        if file_format not in EXPORT_FORMATS:
+            return Response({"detail": f"file_format must be one of {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # staff can export any seller, e.g. for finance
+        seller_id = request.user.id
+        if request.user.is_staff and request.query_params.get('seller'):
+            try:
+                seller_id = int(request.query_params['seller'])
+            except ValueError:
+                return Response({"detail": "seller must be a user id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        columns, rows = export_rows(kind, seller_id)
+        response = streaming_response(
+            request, encode(columns, rows, file_format), content_type=EXPORT_FORMATS[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{kind}-{seller_id}.{file_format}"'
+        return response
+
+
 class ItemDetailView(APIView):
     # only authenticated users can view item details
     permission_classes = (IsAuthenticated,)
@@ -159,11 +362,22 @@ class ItemDetailView(APIView):
 
     def get(self, request, item_id):
         """Get a specific item with auction status and bid information"""
+        # pollers that already have the current version only cost a pk lookup
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            try:
+                version = Item.objects.values_list('version', flat=True).get(pk=item_id)
+            except Item.DoesNotExist:
+                raise NotFound(detail="Item not found")
+            etag = item_etag(item_id, version)
+            if etag_matches(etag, if_none_match):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
         item = self.get_item(pk=item_id)  # Use helper method
         serialized_item = PopulatedItemSerializer(item)
         data = serialized_item.data
 
-        return Response(data, status=status.HTTP_200_OK)
+        return Response(data, status=status.HTTP_200_OK, headers={'ETag': item_etag(item.id, item.version)})
 
     def put(self, request, item_id):
         """Update an item"""
@@ -179,12 +393,33 @@ class ItemDetailView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # a closed auction can only be relisted, and only if nobody won it
+        relist = {}
+        if item_to_update.status != 'ACTIVE':
+            if item_to_update.status != 'FAILED' or 'end_time' not in request.data:
+                return Response(
+                    {"detail": "This auction has ended. A failed auction can only be "
+                               "relisted by moving its end_time into the future."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            relist = {'status': 'ACTIVE', 'closed_at': None}
+
         serialized_item = ItemSerializer(
             item_to_update, data=request.data, partial=True)
 
         try:
             serialized_item.is_valid(raise_exception=True)
-            serialized_item.save()
+            with transaction.atomic():
+                if relist:
+                    # the auction will be counted again when it closes again
+                    uncount_closed(item_to_update)
+                serialized_item.save(version=F('version') + 1, **relist)
+            item_to_update.refresh_from_db(fields=['version'])
+            if 'images' in serialized_item.validated_data:
+                schedule_item_images(item_to_update)
+            forget_state(item_id)
+            invalidate_facets()
+            invalidate_item_list()
             return Response(serialized_item.data, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             return Response(
@@ -206,7 +441,12 @@ class ItemDetailView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        item_to_delete.delete()
+        with transaction.atomic():
+            uncount_closed(item_to_delete)
+            item_to_delete.delete()
+        forget_state(item_id)
+        invalidate_facets()
+        invalidate_item_list()
         return Response({"detail": "Item has been successfully deleted."}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -225,7 +465,7 @@ class UpdateShippingAndPaymentView(APIView):
         item_to_update = self.get_item(pk=item_id)
 
         # check if auction has ended
-        if item_to_update.end_time >= timezone.now():
+        if item_to_update.status == 'ACTIVE':
             return Response({"detail": "Item auction is still in progress."}, status=status.HTTP_412_PRECONDITION_FAILED)
 
         # check if user is highest bidder (winner)
@@ -239,7 +479,8 @@ class UpdateShippingAndPaymentView(APIView):
             item_to_update, data={'shipping_info': shipping_info, 'payment_confirmation': payment_confirmation}, partial=True)
 
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(version=F('version') + 1)
+            invalidate_item_list()
             return Response({"detail": "Shipping information updated successfully.", "data": serializer.data},
                             status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,45 @@
+"""Delivery backends for notifications.
+
+A backend has one method, send(notifications), taking a list of
+notification dicts:
+
+    {'user_id', 'type', 'item_id', 'current_bid', 'event_id', 'created_at'}
+
+with type one of outbid, new_bid, won and ended. It is called with a
+whole batch, and raising makes the dispatcher retry the batch later, so
+delivery is at least once. NOTIFICATION_BACKEND names the backend used.
+"""
+import logging
+import threading
+from collections import defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class LogBackend:
+    """Writes every notification to the notifications.backends logger"""
+
+    def send(self, notifications):
+        for notification in notifications:
+            logger.info('notify user %(user_id)s: %(type)s on item %(item_id)s', notification)
+
+
+class InMemoryBackend:
+    """Keeps the latest notifications of every user in this process, for tests"""
+
+    def __init__(self, max_per_user=100):
+        self._lock = threading.Lock()
+        self._sent = defaultdict(lambda: deque(maxlen=max_per_user))
+
+    def send(self, notifications):
+        with self._lock:
+            for notification in notifications:
+                self._sent[notification['user_id']].append(notification)
+
+    def sent_to(self, user_id):
+        with self._lock:
+            return list(self._sent.get(user_id, ()))
+
+    def clear(self):
+        with self._lock:
+            self._sent.clear()
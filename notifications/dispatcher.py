@@ -0,0 +1,86 @@
+"""Draining the outbox.
+
+`dispatch_batch` takes the oldest NOTIFICATION_BATCH_SIZE events,
+skipping any another dispatcher has locked, and fans them out:
+
+- BID: the users in its outbid list get "outbid", the item's other
+  watchers get "new_bid".
+- ENDED: the winner gets "won", the other watchers get "ended".
+
+All watchers of a batch are read with one query and everything goes to
+the backend in one send() call. The events are then deleted with one
+query, in the same transaction that locked them. A failed send rolls the
+batch back, so its events are retried by the next pass.
+"""
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from authentication.models import Favorite
+from .models import OutboxEvent
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process wide backend named in NOTIFICATION_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(settings.NOTIFICATION_BACKEND)()
+        return _backend
+
+
+def _recipients(kind, payload):
+    """{user id: notification type} of the users named in an event"""
+    if kind == OutboxEvent.BID:
+        return {user_id: 'outbid' for user_id in payload.get('outbid', ())}
+    if payload.get('status') == 'SOLD' and payload.get('highest_bidder'):
+        return {payload['highest_bidder']: 'won'}
+    return {}
+
+
+def fan_out(events, watchers):
+    """Notifications for `events`, given {item id: [watcher ids]}"""
+    notifications = []
+    for event_id, kind, item_id, payload, created_at in events:
+        recipients = _recipients(kind, payload)
+        others = 'new_bid' if kind == OutboxEvent.BID else 'ended'
+        for user_id in watchers.get(item_id, ()):
+            # the new leader does not need to hear about their own bid
+            if user_id not in recipients and user_id != payload.get('highest_bidder'):
+                recipients[user_id] = others
+        notifications += [{
+            'user_id': user_id,
+            'type': kind_name,
+            'item_id': item_id,
+            'current_bid': payload.get('current_bid'),
+            'event_id': event_id,
+            'created_at': created_at,
+        } for user_id, kind_name in recipients.items()]
+    return notifications
+
+
+def dispatch_batch(batch_size=None):
+    """Deliver and delete one batch of events, return (events, notifications)"""
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    with transaction.atomic():
+        events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by(
+            'id').values_list('id', 'kind', 'item_id', 'payload', 'created_at')[:batch_size])
+        if not events:
+            return 0, 0
+
+        watchers = defaultdict(list)
+        for item_id, user_id in Favorite.objects.filter(
+                item_id__in={event[2] for event in events}).values_list('item_id', 'user_id'):
+            watchers[item_id].append(user_id)
+
+        notifications = fan_out(events, watchers)
+        if notifications:
+            get_backend().send(notifications)
+        OutboxEvent.objects.filter(id__in=[event[0] for event in events]).delete()
+    return len(events), len(notifications)
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.dispatcher import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver outbid and auction ended notifications waiting in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.NOTIFICATION_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help='keep draining the outbox until interrupted')
+        parser.add_argument('--interval', type=float, default=settings.NOTIFICATION_POLL_INTERVAL,
+                            help='seconds to wait on an empty outbox with --loop')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        events = notifications = 0
+        while True:
+            batch_events, batch_notifications = dispatch_batch(batch_size)
+            events += batch_events
+            notifications += batch_notifications
+            # a full batch means more are probably waiting
+            if batch_events == batch_size:
+                continue
+            if events or not options['loop']:
+                self.stdout.write(f'Delivered {notifications} notifications for {events} events')
+                events = notifications = 0
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class OutboxEvent(models.Model):
+    """Something users should hear about, waiting for the dispatcher.
+
+    Written in the same transaction as the change it describes, so an
+    event exists if and only if the change committed. The dispatcher
+    deletes events once they have been delivered.
+    """
+    BID = 'BID'
+    ENDED = 'ENDED'
+    KIND_CHOICES = [
+        (BID, 'Bid accepted'),
+        (ENDED, 'Auction ended'),
+    ]
+
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    item = models.ForeignKey(
+        'items.Item',
+        related_name="outbox_events",
+        on_delete=models.CASCADE
+    )
+    # BID: outbid (user ids), highest_bidder, current_bid
+    # ENDED: status, highest_bidder, current_bid
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,32 @@
+"""Writing events to the outbox.
+
+Callers are inside the transaction of the change the event describes, and
+adding an event is a single insert: nothing is delivered here.
+"""
+from .models import OutboxEvent
+
+
+def record_bid(item, previous_bidder_id, bids):
+    """`item` accepted `bids`; `previous_bidder_id` led before them.
+
+    Everyone who led before or during the burst and no longer does has
+    been outbid.
+    """
+    leaders = {previous_bidder_id, *(bid.user_id_id for bid in bids)}
+    outbid = sorted(leaders - {item.highest_bidder_id, None})
+    OutboxEvent.objects.create(kind=OutboxEvent.BID, item=item, payload={
+        'outbid': outbid,
+        'highest_bidder': item.highest_bidder_id,
+        'current_bid': str(item.current_bid),
+    })
+
+
+def record_ended(rows):
+    """Auctions closed, from (item id, status, highest bidder, current bid) rows"""
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(kind=OutboxEvent.ENDED, item_id=item_id, payload={
+            'status': status,
+            'highest_bidder': highest_bidder_id,
+            'current_bid': None if current_bid is None else str(current_bid),
+        }) for item_id, status, highest_bidder_id, current_bid in rows
+    ])
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from bids.services import place_bid
+from common.testing import make_item, make_user
+from items.closing import close_ended_auctions
+from items.models import Item
+from . import dispatcher
+from .backends import InMemoryBackend
+from .dispatcher import dispatch_batch, fan_out
+from .models import OutboxEvent
+
+
+class FailingBackend:
+    def send(self, notifications):
+        raise ConnectionError('backend down')
+
+
+class DispatcherTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('owner')
+        cls.alice = make_user('alice')
+        cls.bob = make_user('bob')
+        cls.carol = make_user('carol')
+
+    def setUp(self):
+        self.item = make_item(self.owner)
+        for user in (self.alice, self.bob, self.carol):
+            user.add_favorite(self.item.id)
+        self.backend = InMemoryBackend()
+        patcher = mock.patch.object(dispatcher, '_backend', self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def types(self, user):
+        return [notification['type'] for notification in self.backend.sent_to(user.id)]
+
+    def test_bid_outbids_previous_leader_and_tells_watchers(self):
+        place_bid(self.item.id, self.alice, Decimal('11.00'))
+        place_bid(self.item.id, self.bob, Decimal('12.00'))
+
+        self.assertEqual(dispatch_batch(), (2, 4))
+        self.assertEqual(self.types(self.alice), ['outbid'])
+        # the leader never hears about their own bid
+        self.assertEqual(self.types(self.bob), ['new_bid'])
+        self.assertEqual(self.types(self.carol), ['new_bid', 'new_bid'])
+        self.assertEqual(self.backend.sent_to(self.alice.id)[0]['current_bid'], '12.00')
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_ended_tells_winner_and_watchers(self):
+        place_bid(self.item.id, self.alice, Decimal('11.00'))
+        Item.objects.filter(pk=self.item.pk).update(end_time=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(close_ended_auctions(), (1, 0))
+        dispatch_batch()
+
+        self.assertEqual(self.types(self.alice), ['won'])
+        self.assertEqual(self.types(self.bob), ['new_bid', 'ended'])
+        self.assertEqual(self.types(self.carol), ['new_bid', 'ended'])
+
+    def test_batches_follow_batch_size(self):
+        for amount in ('11.00', '12.00', '13.00'):
+            place_bid(self.item.id, self.carol if amount == '12.00' else self.alice, Decimal(amount))
+
+        self.assertEqual(dispatch_batch(batch_size=2)[0], 2)
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        self.assertEqual(dispatch_batch(batch_size=2)[0], 1)
+        self.assertEqual(dispatch_batch(batch_size=2), (0, 0))
+
+    def test_failed_send_keeps_events(self):
+        place_bid(self.item.id, self.alice, Decimal('11.00'))
+        with mock.patch.object(dispatcher, '_backend', FailingBackend()):
+            with self.assertRaises(ConnectionError):
+                dispatch_batch()
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+        dispatch_batch()
+        self.assertEqual(self.types(self.bob), ['new_bid'])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class FanOutTests(TestCase):
+    def test_outbid_users_are_not_also_sent_new_bid(self):
+        events = [(1, OutboxEvent.BID, 7, {'outbid': [2], 'highest_bidder': 3, 'current_bid': '5.00'},
+                   timezone.now())]
+        notifications = fan_out(events, {7: [2, 3, 4]})
+        self.assertEqual({(n['user_id'], n['type']) for n in notifications},
+                         {(2, 'outbid'), (4, 'new_bid')})
+
+    def test_failed_auction_has_no_winner(self):
+        events = [(1, OutboxEvent.ENDED, 7, {'status': 'FAILED', 'highest_bidder': None,
+                                             'current_bid': None}, timezone.now())]
+        notifications = fan_out(events, {7: [2]})
+        self.assertEqual([(n['user_id'], n['type']) for n in notifications], [(2, 'ended')])
@@ -3,6 +3,11 @@ ASGI config for project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Live bid streams (bidhub/marketplace/<item_id>/bids/stream/) are long-lived
+connections served by bids.stream.BidStreamApp in front of Django, so they
+need the project to run under an ASGI server, e.g.
+``gunicorn project.asgi -k uvicorn_worker.UvicornWorker`` as in the Procfile.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +18,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported once Django is set up, the stream needs the models
+from bids.stream import BidStreamApp  # noqa: E402
+
+application = BidStreamApp(django_application)
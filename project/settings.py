@@ -3,6 +3,7 @@ from decouple import config
 from pathlib import Path
 import os
 import dj_database_url
+from decimal import Decimal
 
 # Build paths
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,6 +29,7 @@ INSTALLED_APPS = [
     'reviews',
     'items',
     'payments',
+    'notifications',
     'corsheaders',
 ]
 
@@ -92,6 +94,12 @@ DATABASES = {
 if not 'ON_HEROKU' in os.environ:
     DEBUG = True
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -116,6 +124,90 @@ PAYPAL_CLIENT_SECRET = os.getenv('PAYPAL_CLIENT_SECRET')
 PAYPAL_MODE = os.getenv('PAYPAL_MODE', 'sandbox')
 PAYPAL_API_BASE_URL = 'https://api-m.sandbox.paypal.com' if PAYPAL_MODE == 'sandbox' else 'https://api-m.paypal.com'
 
+# Smallest step a proxy bid raises the price by
+BID_INCREMENT = Decimal(os.getenv('BID_INCREMENT', '1.00'))
+
+# Cached owner / price / end time of auctions, used to turn away losing
+# bids before they take the item row lock
+AUCTION_STATE_CACHE = 'default'
+AUCTION_STATE_TIMEOUT = 300  # seconds
+
+# Category / condition counts of active items, served by bidhub/marketplace/facets/
+ITEM_FACETS_CACHE = 'default'
+ITEM_FACETS_TIMEOUT = 30  # seconds
+
+# Responses of the item list for anonymous visitors
+ITEM_LIST_CACHE = 'default'
+ITEM_LIST_CACHE_TIMEOUT = 60  # seconds
+
+# Resized copies of item images, built by a worker pool after items are
+# saved and stored in the default storage. Sizes are the longest edge in px
+ITEM_IMAGE_PIPELINE_ENABLED = os.getenv('ITEM_IMAGE_PIPELINE_ENABLED', 'True') == 'True'
+ITEM_IMAGE_WORKERS = int(os.getenv('ITEM_IMAGE_WORKERS', '2'))
+ITEM_IMAGE_SIZES = {'thumb': 160, 'card': 480, 'full': 1600}
+ITEM_IMAGE_QUALITY = 85
+ITEM_IMAGE_FETCH_TIMEOUT = 10  # seconds
+# Limits on originals fetched from seller supplied URLs: only public
+# addresses (and, if not empty, only these hosts) are fetched, bodies stop
+# at ITEM_IMAGE_MAX_BYTES and images over ITEM_IMAGE_MAX_PIXELS are not decoded
+ITEM_IMAGE_ALLOWED_HOSTS = [host for host in os.getenv('ITEM_IMAGE_ALLOWED_HOSTS', '').split(',') if host]
+ITEM_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+ITEM_IMAGE_MAX_PIXELS = 40_000_000
+ITEM_IMAGE_MAX_REDIRECTS = 3
+
+# Rows validated and inserted together by the bulk item import
+ITEM_IMPORT_CHUNK_SIZE = 500
+
+# Rows fetched per round trip by the streaming seller exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Lines of a streamed export or import report sent per chunk under ASGI
+STREAMING_BATCH_LINES = 500
+
+# "Trending now" feed: active items ranked by time decayed bid velocity over
+# the last TRENDING_WINDOW seconds, rebuilt every TRENDING_REFRESH_INTERVAL
+TRENDING_CACHE = 'default'
+TRENDING_REFRESH_INTERVAL = int(os.getenv('TRENDING_REFRESH_INTERVAL', '60'))  # seconds
+# an out of date feed is still served while one request rebuilds it
+TRENDING_STALE_TIMEOUT = 60 * 60  # seconds
+TRENDING_REBUILD_LOCK_TIMEOUT = 60  # seconds
+TRENDING_WINDOW = 24 * 60 * 60  # seconds
+TRENDING_HALF_LIFE = 2 * 60 * 60  # seconds
+TRENDING_SIZE = 50
+
+# "Similar items" of the item detail page, rebuilt by build_similar_items:
+# neighbours kept per item, items compared per block and candidates per
+# chunk (a block x chunk float32 score matrix is the main memory cost)
+SIMILAR_ITEMS_K = 10
+SIMILAR_ITEMS_BLOCK_SIZE = 512
+SIMILAR_ITEMS_CHUNK_SIZE = 16384
+
+# Realized-price index of closed auctions, updated by build_price_index.
+# Auctions closed in the last PRICE_INDEX_SETTLE_DELAY seconds wait for the
+# next run, so a close_auctions batch still committing is never skipped
+PRICE_INDEX_CHUNK_SIZE = 5000
+PRICE_INDEX_SETTLE_DELAY = 300  # seconds
+
+# Most item ids accepted by one bulk favorites add/remove or count request
+FAVORITES_BULK_LIMIT = 500
+
+# Bid sequencing: write bids for the same item through one writer thread
+BID_SEQUENCER_ENABLED = os.getenv('BID_SEQUENCER_ENABLED', 'False') == 'True'
+BID_SEQUENCER_WORKERS = int(os.getenv('BID_SEQUENCER_WORKERS', '8'))
+BID_SEQUENCER_MAX_BATCH = 200  # most bids resolved in one transaction
+BID_SEQUENCER_TIMEOUT = 10  # seconds a request waits for its bid
+
+# Fans live bid events out to clients of bidhub/marketplace/<item_id>/bids/stream/.
+# The in-memory backend only reaches clients of the same process: run a
+# single web process with it, or name a backend shared by every process.
+BID_STREAM_BACKEND = 'bids.stream.InMemoryChannelBackend'
+
+# Outbid / auction ended notifications: events are written to an outbox with
+# the bid or close that caused them and delivered by dispatch_notifications
+NOTIFICATION_BACKEND = 'notifications.backends.LogBackend'
+NOTIFICATION_BATCH_SIZE = 1000  # outbox events read, delivered and deleted together
+NOTIFICATION_POLL_INTERVAL = 1  # seconds the dispatcher sleeps on an empty outbox
+
 # FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
 
 LANGUAGE_CODE = 'en-us'
@@ -128,4 +220,7 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
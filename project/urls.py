@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
@@ -12,3 +14,6 @@ urlpatterns = [
     path('bidhub/paypal/', include('payments.urls')),
     path('bidhub/payments/', include('payments.urls')),
 ]
+
+# item image derivatives in development, production serves MEDIA_URL itself
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
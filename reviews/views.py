@@ -13,7 +13,6 @@ from items.models import Item  # Import Item from items app
 from .serializers.common import ReviewSerializer
 from .serializers.populated import PopulatedReviewSerializer
 from authentication.serializers import UserSerializer
-from django.utils import timezone
 from decimal import Decimal
 
 class ReviewPagination(PageNumberPagination):
@@ -85,7 +84,7 @@ class CreateReview(APIView):
         if not Item.objects.filter(
             owner_id=seller.id,
             highest_bidder_id=request.user.id,
-            end_time__lt=timezone.now()
+            status='SOLD'
         ).exists():
             return Response(
                 {"detail": "You can only review sellers you've purchased from after the auction has ended"},